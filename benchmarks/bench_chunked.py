@@ -0,0 +1,56 @@
+"""
+長い入力を分割して並列に変換する場合と、1回で変換する場合の所要時間の比較
+
+出力の長さに比例して応答が遅くなるモックサーバーを使い、ConversionEngineで同じ入力を変換する。
+
+実行: python benchmarks/bench_chunked.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corrector import ConversionEngine, ConversionJob, make_options  # noqa: E402
+from mock_openrouter import MockOpenRouterServer  # noqa: E402
+
+# 最初のトークンまでの時間と、1文字あたりの生成時間（おおむね1秒に500文字）
+RESPONSE_DELAY = 0.3
+DELAY_PER_CHAR = 0.002
+SENTENCE = "今日は来週の会議で使う資料を確認して、担当者に進捗を報告しました。"
+
+
+def convert(server: MockOpenRouterServer, input_text: str, chunked: bool) -> float:
+    """1回変換して所要時間を返す（キャッシュ・前処理・差分変換は使わない）"""
+    options = make_options({
+        "api_url": server.url,
+        "chunked_correction_enabled": chunked,
+        "incremental_correction_enabled": False,
+        "response_cache_enabled": False,
+        "prepass_enabled": False,
+    })
+    with contextlib.redirect_stdout(io.StringIO()), ConversionEngine(options) as engine:
+        started_at = time.perf_counter()
+        engine.correct_sync(ConversionJob(input_text))
+        return time.perf_counter() - started_at
+
+
+def main():
+    os.environ.setdefault("OPENROUTER_API_KEY", "benchmark")
+    defaults = make_options()
+    print(f"分割の閾値 {defaults['chunk_threshold_chars']}文字, 1チャンク最大 {defaults['chunk_max_chars']}文字, "
+          f"並列数 {defaults['chunk_workers']}")
+    print(f"{'入力':>8} {'1回で変換':>10} {'分割して並列':>12} {'短縮':>6}")
+    with MockOpenRouterServer(response_delay=RESPONSE_DELAY, delay_per_char=DELAY_PER_CHAR) as server:
+        for sentences in (10, 40, 80):
+            input_text = SENTENCE * sentences
+            single = convert(server, input_text, chunked=False)
+            parallel = convert(server, input_text, chunked=True)
+            print(f"{len(input_text):>7}字 {single:>9.2f}秒 {parallel:>11.2f}秒 {single / parallel:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+extract_json_response のベンチマーク（壊れた長い応答での処理時間）
+
+tests/pathological_inputs.py の各入力を100KBと200KBで解析し、処理時間と長さを倍にしたときの比を表示する。
+比がおおむね2なら、処理時間は入力の長さに比例している。
+
+実行: python benchmarks/bench_extract_json.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path[:0] = [ROOT, os.path.join(ROOT, "tests")]
+
+from corrector import ResponseParseError, extract_json_response  # noqa: E402
+from pathological_inputs import PATHOLOGICAL_INPUTS  # noqa: E402
+
+SIZES = (100_000, 200_000)
+
+
+def measure(content: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        try:
+            extract_json_response(content)
+        except ResponseParseError:
+            pass
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def main():
+    print(f"{'入力':<16}" + "".join(f"{size // 1000:>9}KB" for size in SIZES) + f"{'比':>7}")
+    for name, make in PATHOLOGICAL_INPUTS.items():
+        times = [measure(make(size)) for size in SIZES]
+        print(f"{name:<16}" + "".join(f"{t * 1000:>9.1f}ms" for t in times) + f"{times[1] / times[0]:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+接続を使い回すOpenRouterClientと、リクエストごとに接続するrequests.postの比較
+
+ローカルのモックサーバーに同じリクエストを続けて送り、1回あたりの時間を表示する。
+ローカルではTLSがないため、新しい接続ごとの遅延（connection_delay）でハンドシェイクの時間を再現する。
+
+実行: python benchmarks/bench_http_pool.py
+"""
+
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corrector import OpenRouterClient  # noqa: E402
+from mock_openrouter import MockOpenRouterServer  # noqa: E402
+
+REQUESTS = 30
+# 新しい接続ごとの遅延（0はローカルのTCPのみ、0.05秒は遠いサーバーへのTCP+TLSの目安）
+CONNECTION_DELAYS = (0.0, 0.05)
+DATA = {"model": "mock", "messages": [{"role": "user", "content": '{"input_text": "ベンチマーク"}'}]}
+
+
+def per_request(send) -> float:
+    """REQUESTS回送信したときの1回あたりの時間の中央値"""
+    times = []
+    for _ in range(REQUESTS):
+        started_at = time.perf_counter()
+        response = send()
+        response.raise_for_status()
+        times.append(time.perf_counter() - started_at)
+    return statistics.median(times)
+
+
+def main():
+    print(f"{'接続の遅延':>8} {'requests.post':>14} {'OpenRouterClient':>17} {'1回あたりの短縮':>14}")
+    for delay in CONNECTION_DELAYS:
+        with MockOpenRouterServer(connection_delay=delay) as server:
+            fresh = per_request(lambda: requests.post(server.url, json=DATA, timeout=10))
+            fresh_connections = server.connections
+
+            client = OpenRouterClient(api_url=server.url)
+            pooled = per_request(lambda: client.post_chat("dummy", DATA))
+            client.close()
+            pooled_connections = server.connections - fresh_connections
+
+        print(f"{delay * 1000:>7.0f}ms {fresh * 1000:>9.2f}ms ({fresh_connections}接続) "
+              f"{pooled * 1000:>9.2f}ms ({pooled_connections}接続) {(fresh - pooled) * 1000:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+参照フォルダのインデックス（ReferenceFolderIndex）のベンチマーク
+
+一時フォルダに参照ファイルを作り、初回の構築・変更がないときの更新・一部のファイルを変更したときの更新・
+検索（1ファイル内とフォルダ全体）の時間と、インデックスのファイルサイズを表示する。
+
+実行: python benchmarks/bench_reference_index.py [ファイル数]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corrector import ReferenceFolderIndex, ReferenceIndex  # noqa: E402
+
+FILES = 3000
+LINES_PER_FILE = 40
+CHANGED_FILES = 5
+QUERY_MAX_CHARS = 1500
+QUERY_TOP_K = 5
+WORDS = ("音声 入力 修正 会議 議事録 予定 確認 資料 来週 担当 "
+         "報告 進捗 課題 対応 検討 結果 開発 品質 顧客 提案").split()
+
+
+def make_sentence(rng: random.Random) -> str:
+    return "".join(rng.choice(WORDS) for _ in range(rng.randint(6, 15))) + "。"
+
+
+def timed(function, repeat: int = 1):
+    """repeat回実行して、最後の戻り値と1回あたりの時間を返す"""
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - started_at) / repeat
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else FILES
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as workdir:
+        folder = os.path.join(workdir, "reference")
+        index_path = os.path.join(workdir, "reference_index.sqlite3")
+        os.makedirs(os.path.join(folder, "sub"))
+
+        paths = []
+        for i in range(files):
+            path = os.path.join(folder, "sub" if i % 3 == 0 else "", f"file{i:05d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(make_sentence(rng) for _ in range(LINES_PER_FILE)))
+            paths.append(path)
+        print(f"参照ファイル {files}件（1件あたり{LINES_PER_FILE}行）")
+
+        index = ReferenceFolderIndex(index_path, folder)
+        counts, elapsed = timed(index.refresh)
+        print(f"初回の構築            {elapsed:>8.2f}秒  (更新{counts[0]}件, 削除{counts[1]}件)")
+        index.close()
+
+        index = ReferenceFolderIndex(index_path, folder)
+        counts, elapsed = timed(index.refresh)
+        print(f"変更なしの更新        {elapsed:>8.3f}秒  (更新{counts[0]}件, 削除{counts[1]}件)")
+
+        for path in paths[:CHANGED_FILES]:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n追加の文章です。")
+        os.remove(paths[-1])
+        counts, elapsed = timed(index.refresh)
+        print(f"一部を変更した更新    {elapsed:>8.3f}秒  (更新{counts[0]}件, 削除{counts[1]}件)")
+
+        query = make_sentence(rng) + make_sentence(rng)
+        target = os.path.relpath(paths[CHANGED_FILES], folder)
+        selected, elapsed = timed(lambda: index.select(query, QUERY_MAX_CHARS, QUERY_TOP_K, path=target), 50)
+        print(f"検索（1ファイル内）   {elapsed * 1000:>8.2f}ms")
+
+        with open(paths[CHANGED_FILES], encoding="utf-8") as f:
+            text = f.read()
+        in_memory, elapsed = timed(lambda: ReferenceIndex.from_text(text, index.passage_chars).select(
+            query, QUERY_MAX_CHARS, QUERY_TOP_K), 50)
+        print(f"  （メモリ上で毎回構築 {elapsed * 1000:>6.2f}ms, 結果の一致: {selected == in_memory}）")
+
+        _, elapsed = timed(lambda: index.select(query, QUERY_MAX_CHARS, QUERY_TOP_K), 5)
+        print(f"検索（フォルダ全体）  {elapsed * 1000:>8.1f}ms")
+        index.close()
+        print(f"インデックスのサイズ  {os.path.getsize(index_path) / 1e6:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+CorrectedTextStreamParser のマイクロベンチマーク
+
+数KB〜数十KBの応答を、ストリーミングと同じ程度の小さなチャンクで渡したときの処理時間を、
+チャンクごとに受信済みのバッファ全体を解析し直す方法（従来の方式）と比べる。
+
+実行: python benchmarks/bench_stream_parser.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from corrector import CorrectedTextStreamParser  # noqa: E402
+
+# ストリーミングの1回の差分の文字数（OpenRouterの差分はおおむね数文字）
+CHUNK_CHARS = 4
+# 全体の再解析と比べる応答の長さの上限
+RESCAN_MAX_CHARS = 8_000
+
+
+def make_response(chars: int) -> str:
+    sentence = '今日は「会議」の資料を確認しました。\\n次に "進捗" を報告します。'
+    text = (sentence * (chars // len(sentence) + 1))[:chars]
+    return json.dumps({"corrected_text": text}, ensure_ascii=False)
+
+
+def incremental(chunks):
+    parser = CorrectedTextStreamParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.text
+
+
+def rescan(chunks):
+    """チャンクごとにバッファ全体を先頭から解析し直す"""
+    buffer = ""
+    text = ""
+    for chunk in chunks:
+        buffer += chunk
+        parser = CorrectedTextStreamParser()
+        parser.feed(buffer)
+        text = parser.text
+    return text
+
+
+def measure(function, chunks, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        function(chunks)
+        best = min(best, time.perf_counter() - started_at)
+    return best
+
+
+def main():
+    print(f"{'応答の長さ':>10} {'逐次解析':>10} {'全体の再解析':>12} {'倍率':>6}")
+    for chars in (2_000, 8_000, 32_000):
+        response = make_response(chars)
+        chunks = [response[i:i + CHUNK_CHARS] for i in range(0, len(response), CHUNK_CHARS)]
+        assert incremental(chunks) == json.loads(response)["corrected_text"]
+        fast = measure(incremental, chunks, repeat=5)
+        if chars > RESCAN_MAX_CHARS:
+            # 再解析は応答の長さの2乗に比例し、数十秒かかるため省く
+            print(f"{len(response):>9}字 {fast * 1000:>8.2f}ms {'-':>12} {'-':>6}")
+            continue
+        slow = measure(rescan, chunks, repeat=1)
+        print(f"{len(response):>9}字 {fast * 1000:>8.2f}ms {slow * 1000:>10.1f}ms {slow / fast:>5.0f}x")
+
+
+if __name__ == "__main__":
+    main()
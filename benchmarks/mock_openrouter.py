@@ -0,0 +1,99 @@
+"""
+ベンチマーク用の、OpenRouterのチャット補完APIの代わりをするローカルサーバー
+
+応答の corrected_text は入力をそのまま返す。遅延は次の3つを設定できる:
+  connection_delay  新しい接続を受け付けたときの遅延（TCP/TLSハンドシェイクの代わり）
+  response_delay    リクエストごとの固定の遅延（最初のトークンまでの時間の代わり）
+  delay_per_char    出力1文字あたりの遅延（生成速度の代わり）
+"""
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockOpenRouterServer(ThreadingHTTPServer):
+    """別スレッドで動くモックサーバー（with文で起動・停止する）"""
+
+    daemon_threads = True
+
+    def __init__(self, connection_delay: float = 0.0, response_delay: float = 0.0,
+                 delay_per_char: float = 0.0):
+        super().__init__(("127.0.0.1", 0), _MockHandler)
+        self.connection_delay = connection_delay
+        self.response_delay = response_delay
+        self.delay_per_char = delay_per_char
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/api/v1/chat/completions"
+
+    def __enter__(self) -> "MockOpenRouterServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        self.server_close()
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: MockOpenRouterServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # ヘッダーと本文を別々に書き込むため、Nagleアルゴリズムで応答が遅れないようにする
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.count("connections")
+        time.sleep(self.server.connection_delay)
+
+    def do_POST(self):
+        self.server.count("requests")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        try:
+            input_text = json.loads(body["messages"][-1]["content"]).get("input_text", "")
+        except (ValueError, AttributeError):
+            input_text = ""
+        content = json.dumps({"corrected_text": input_text}, ensure_ascii=False)
+        time.sleep(self.server.response_delay)
+
+        if not body.get("stream"):
+            time.sleep(self.server.delay_per_char * len(input_text))
+            payload = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        step = 8
+        for i in range(0, len(content), step):
+            time.sleep(self.server.delay_per_char * step)
+            event = {"choices": [{"delta": {"content": content[i:i + step]}}]}
+            self._write_chunk(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
@@ -0,0 +1,128 @@
+"""
+VOICE_CORRECTOR の変換処理（GUIに依存しないコア部分）
+
+tkinterやwinsoundを読み込まないため、画面のない環境やバッチ処理からも利用できる
+"""
+
+import importlib
+from typing import Dict, Optional
+
+
+# 公開する名前 -> 定義しているモジュール
+# （最初に使われたときに読み込む。--pipeなどで使わないsqlite3やctypesの読み込みで起動が遅くならないように）
+_EXPORTS = {
+    "BatchRunner": "batch",
+    "run_batch": "batch",
+    "ResponseCache": "cache",
+    "build_chunk_messages": "chunking",
+    "join_chunks": "chunking",
+    "split_into_chunks": "chunking",
+    "OpenRouterClient": "client",
+    "parse_retry_after": "client",
+    "DEFAULT_OPTIONS": "config",
+    "load_settings_file": "config",
+    "make_options": "config",
+    "ConversionEngine": "engine",
+    "ConversionJob": "engine",
+    "EngineEvent": "engine",
+    "APIError": "errors",
+    "CircuitOpenError": "errors",
+    "ConversionCancelled": "errors",
+    "MalformedResponseError": "errors",
+    "ResponseParseError": "errors",
+    "ParagraphMemo": "incremental",
+    "split_into_paragraphs": "incremental",
+    "NoOpDecision": "noop",
+    "NoOpDetector": "noop",
+    "CorrectedTextStreamParser": "parsing",
+    "ParsePathStats": "parsing",
+    "extract_json_response": "parsing",
+    "parse_corrected_text": "parsing",
+    "Prepass": "prepass",
+    "PrepassResult": "prepass",
+    "PromptBuilder": "prompt",
+    "SystemPrompt": "prompt",
+    "build_system_prompt": "prompt",
+    "ReferenceContentCache": "reference_cache",
+    "ReferenceFolderIndex": "reference_index",
+    "ReferenceWatcher": "reference_watcher",
+    "ReferenceIndex": "retrieval",
+    "ReferenceRetriever": "retrieval",
+    "CircuitBreaker": "retry",
+    "RetryPolicy": "retry",
+    "RetryStats": "retry",
+    "SpeculationBudget": "speculation",
+}
+
+
+def correct(text: str, policy: str = "", reference: str = "",
+            options: Optional[Dict] = None) -> str:
+    """音声入力されたテキストを修正して返す
+
+    optionsにはDEFAULT_OPTIONSと同じキーで設定を渡す（省略したキーは既定値）
+    """
+    from .config import make_options
+    from .engine import ConversionEngine, ConversionJob
+
+    with ConversionEngine(make_options(options)) as engine:
+        return engine.correct_sync(ConversionJob(text, policy, reference))
+
+
+__all__ = [
+    "APIError",
+    "BatchRunner",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ConversionCancelled",
+    "ConversionEngine",
+    "ConversionJob",
+    "CorrectedTextStreamParser",
+    "DEFAULT_OPTIONS",
+    "EngineEvent",
+    "MalformedResponseError",
+    "NoOpDecision",
+    "NoOpDetector",
+    "OpenRouterClient",
+    "ParagraphMemo",
+    "ParsePathStats",
+    "Prepass",
+    "PrepassResult",
+    "PromptBuilder",
+    "ReferenceContentCache",
+    "ReferenceFolderIndex",
+    "ReferenceIndex",
+    "ReferenceRetriever",
+    "ReferenceWatcher",
+    "ResponseCache",
+    "ResponseParseError",
+    "RetryPolicy",
+    "RetryStats",
+    "SpeculationBudget",
+    "SystemPrompt",
+    "build_chunk_messages",
+    "build_system_prompt",
+    "correct",
+    "extract_json_response",
+    "join_chunks",
+    "load_settings_file",
+    "make_options",
+    "parse_corrected_text",
+    "parse_retry_after",
+    "run_batch",
+    "split_into_chunks",
+    "split_into_paragraphs",
+]
+
+
+def __getattr__(name: str):
+    """公開する名前を、最初に使われたときに定義元のモジュールから読み込む"""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module("." + module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,280 @@
+"""
+保存済みの文字起こしをまとめて変換するバッチ処理
+"""
+
+import glob
+import hashlib
+import json
+import os
+import queue
+import time
+from concurrent.futures import Future
+from typing import Dict, Iterator, NamedTuple, Optional, TextIO, Tuple
+
+from .engine import ConversionEngine, ConversionJob
+
+
+class BatchItem(NamedTuple):
+    """バッチの入力1件（読み込めなかった入力はerrorに理由を持つ）"""
+    item_id: str
+    text: str
+    error: Optional[str] = None
+
+
+class BatchStats:
+    """バッチ処理の件数と処理量"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.succeeded = 0
+        self.failed = 0
+        self.resumed = 0
+        self.input_chars = 0
+
+    @property
+    def completed(self) -> int:
+        return self.succeeded + self.failed
+
+    def __str__(self) -> str:
+        # 処理速度は今回実際に変換した分だけで求める
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return (f"{self.completed}件（成功 {self.succeeded}, 失敗 {self.failed}） "
+                f"前回から再開 {self.resumed}件 {elapsed:.1f}秒 "
+                f"{self.completed / elapsed * 60:.1f}件/分 {self.input_chars / elapsed:.1f}文字/秒")
+
+
+def read_batch_items(input_path: str) -> Iterator[BatchItem]:
+    """入力を読み込む
+
+    ディレクトリなら中の.txtファイル1つを1件、それ以外はJSONL（1行1件、"text"と任意の"id"）として読む。
+    読み込めない1件（UTF-8でないファイル、壊れた行、文字列でない"text"）はerror付きで返し、残りは読み続ける
+    """
+    if os.path.isdir(input_path):
+        for path in sorted(glob.glob(os.path.join(input_path, "*.txt"))):
+            item_id = os.path.basename(path)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    yield BatchItem(item_id, f.read().strip())
+            except (OSError, UnicodeDecodeError) as e:
+                yield BatchItem(item_id, "", error=f"ファイルを読み込めません: {e}")
+        return
+
+    with open(input_path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            item_id = str(line_number)
+            try:
+                line = line.decode('utf-8')
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+            except ValueError as e:
+                # UnicodeDecodeErrorとJSONDecodeErrorはどちらもValueError
+                yield BatchItem(item_id, "", error=f"{line_number}行目を読み込めません: {e}")
+                continue
+            if not isinstance(record, dict):
+                yield BatchItem(item_id, "", error=f"{line_number}行目がJSONオブジェクトではありません")
+                continue
+            item_id = str(record.get("id", line_number))
+            text = record.get("text", record.get("input_text"))
+            if not isinstance(text, str):
+                yield BatchItem(item_id, "", error=f"{line_number}行目に文字列の\"text\"がありません")
+                continue
+            yield BatchItem(item_id, text.strip())
+
+
+def input_hash(text: str) -> str:
+    """入力内容のハッシュ（同じIDでも内容が変わった入力は変換し直す）"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class BatchCheckpoint:
+    """完了した入力IDと結果を記録するジャーナル
+
+    1件完了するごとにJSONLで追記してディスクに書き込むため、途中で止まっても完了分は失われない。
+    書き込み途中で壊れた末尾の行は読み込み時に切り捨てる
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[TextIO] = None
+
+    def load(self) -> Dict[str, Dict]:
+        """記録済みの結果を読み込む（戻り値は 入力ID -> 出力レコード）"""
+        completed: Dict[str, Dict] = {}
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return completed
+
+        valid_length = 0
+        for line in data.splitlines(keepends=True):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            completed[entry["id"]] = entry
+            valid_length += len(line)
+
+        if valid_length < len(data):
+            print(f"チェックポイントの壊れた末尾を切り捨てます: {self.path}")
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_length)
+        return completed
+
+    def open(self):
+        """追記用に開く"""
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def record(self, entry: Dict):
+        """完了した1件を記録"""
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BatchRunner:
+    """変換エンジンに入力を並列に流し、完了した順にJSONLへ書き出す
+
+    同時に実行する件数（workers）と、1秒あたりに開始する件数（rate_limit、0なら無制限）を制限する。
+    checkpointがあれば、記録済みの入力は変換せずに記録の結果を書き出す。
+    出力とチェックポイントへの書き込み（fsyncを含む）は、エンジンのイベントループを止めないよう
+    runを呼んだスレッドで行う
+    """
+
+    def __init__(self, engine: ConversionEngine, output: TextIO, conversion_policy: str = "",
+                 reference_text: str = "", workers: int = 4, rate_limit: float = 0.0,
+                 checkpoint: Optional[BatchCheckpoint] = None):
+        self.engine = engine
+        self.output = output
+        self.conversion_policy = conversion_policy
+        self.reference_text = reference_text
+        self.workers = workers
+        self.rate_limit = rate_limit
+        self.checkpoint = checkpoint
+        self.stats = BatchStats()
+
+        # 実行中の件数と、エンジンのスレッドから届く完了の通知
+        self._in_flight = 0
+        self._done: "queue.Queue[Tuple[BatchItem, ConversionJob, Future, float]]" = queue.Queue()
+        self._next_start = time.monotonic()
+
+    def run(self, items: Iterator[BatchItem]) -> BatchStats:
+        """すべての入力を変換し、完了を待って集計を返す"""
+        self.stats = BatchStats()
+        completed = self.checkpoint.load() if self.checkpoint else {}
+        if self.checkpoint:
+            self.checkpoint.open()
+        try:
+            self._run_items(items, completed)
+        finally:
+            # 入力の読み込みが途中で失敗しても、実行中の変換の結果を書き出してから閉じる
+            self._drain()
+            if self.checkpoint:
+                self.checkpoint.close()
+        return self.stats
+
+    def _run_items(self, items: Iterator[BatchItem], completed: Dict[str, Dict]):
+        """記録済みの入力は結果を書き出すだけにし、残りを変換する"""
+        for item in items:
+            if item.error is not None:
+                self._write_output({"id": item.item_id, "error": item.error})
+                self.stats.failed += 1
+                print(f"[{self.stats.completed}] {item.item_id}: 失敗 {item.error}")
+                continue
+            if not item.text:
+                continue
+            entry = completed.get(item.item_id)
+            if entry is not None and entry["input_hash"] == input_hash(item.text):
+                self._write_output(entry["record"])
+                self.stats.resumed += 1
+                continue
+            # 同時に実行する件数がworkersに達していたら、1件終わるのを待つ
+            while self._in_flight >= self.workers:
+                self._finish_one()
+            self._wait_for_rate_limit()
+            job = ConversionJob(item.text, self.conversion_policy, self.reference_text)
+            future = self.engine.submit(job)
+            self._in_flight += 1
+            future.add_done_callback(
+                lambda future, item=item, job=job, started_at=time.monotonic():
+                    self._done.put((item, job, future, time.monotonic() - started_at)))
+
+    def _wait_for_rate_limit(self):
+        """開始間隔が1/rate_limit秒以上になるように待つ"""
+        if self.rate_limit <= 0:
+            return
+        now = time.monotonic()
+        if self._next_start > now:
+            time.sleep(self._next_start - now)
+        self._next_start = max(now, self._next_start) + 1.0 / self.rate_limit
+
+    def _drain(self):
+        """実行中の変換がすべて終わるまで待ち、結果を書き出す"""
+        while self._in_flight:
+            self._finish_one()
+
+    def _finish_one(self):
+        """完了した1件を受け取って書き出す（runを呼んだスレッドで実行）"""
+        item, job, future, elapsed = self._done.get()
+        self._in_flight -= 1
+        record: Dict = {"id": item.item_id, "input_text": item.text}
+        try:
+            record["corrected_text"] = future.result()
+            record["from_cache"] = job.from_cache
+        except BaseException as e:
+            record["error"] = str(e) or type(e).__name__
+        record["elapsed"] = round(elapsed, 3)
+
+        self._write_output(record)
+        if "error" in record:
+            self.stats.failed += 1
+            print(f"[{self.stats.completed}] {item.item_id}: 失敗 {record['error']}")
+        else:
+            self.stats.succeeded += 1
+            if self.checkpoint:
+                self.checkpoint.record({"id": item.item_id, "input_hash": input_hash(item.text),
+                                        "record": record})
+            print(f"[{self.stats.completed}] {item.item_id}: 完了 {record['elapsed']}秒")
+        self.stats.input_chars += len(item.text)
+
+    def _write_output(self, record: Dict):
+        """結果を1行書き出す"""
+        self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.output.flush()
+
+
+def run_batch(input_path: str, output_path: str, settings: Dict,
+              workers: Optional[int] = None, rate_limit: Optional[float] = None,
+              resume: bool = True) -> BatchStats:
+    """settings（settings.jsonと同じキー）の変換方針・参考文章で入力をまとめて変換
+
+    チェックポイント（出力ファイル名 + .checkpoint）に記録済みの入力は変換し直さない。
+    出力ファイルは毎回チェックポイントの内容から作り直すので、途中で壊れていても復元される。
+    resumeがFalseならチェックポイントを消して最初から変換する
+    """
+    workers = workers or settings["batch_workers"]
+    rate_limit = settings["batch_rate_limit"] if rate_limit is None else rate_limit
+
+    checkpoint = BatchCheckpoint(output_path + ".checkpoint")
+    if not resume and os.path.exists(checkpoint.path):
+        os.remove(checkpoint.path)
+
+    # 同時に実行する件数だけ接続を用意する
+    engine_settings = dict(settings, http_pool_size=max(settings["http_pool_size"], workers))
+    with ConversionEngine(engine_settings) as engine, open(output_path, 'w', encoding='utf-8') as output:
+        runner = BatchRunner(engine, output,
+                             conversion_policy=settings.get("conversion_policy", ""),
+                             reference_text=settings.get("reference_text", ""),
+                             workers=workers, rate_limit=rate_limit, checkpoint=checkpoint)
+        stats = runner.run(read_batch_items(input_path))
+        coalesced_requests = engine.coalesced_requests
+    print(f"=== バッチ変換完了：{stats} 同一リクエストの共有で節約 {coalesced_requests}回 ===")
+    return stats
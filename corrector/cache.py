@@ -0,0 +1,134 @@
+"""
+変換結果のキャッシュ
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class ResponseCache:
+    """変換結果のキャッシュ
+
+    プロンプト・モデル・温度のハッシュをキーとし、メモリ上のLRU（バイト数で上限）と
+    ディスク上の永続化層の2段で保持する。どちらもTTLを過ぎたエントリは破棄する
+    """
+
+    def __init__(self, cache_dir: str, memory_limit_bytes: int = 4 * 1024 * 1024,
+                 ttl_seconds: float = 7 * 24 * 60 * 60):
+        self.cache_dir = cache_dir
+        self.memory_limit_bytes = memory_limit_bytes
+        self.ttl_seconds = ttl_seconds
+
+        # key -> (作成時刻, 変換結果)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(system_prompt: str, user_message: str, model: str, temperature: float) -> str:
+        """リクエスト内容からキャッシュキー（SHA-256）を生成"""
+        material = json.dumps([system_prompt, user_message, model, temperature], ensure_ascii=False)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """キャッシュから変換結果を取得（メモリ→ディスクの順に探す）"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, text = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    return text
+                self._remove_memory(key)
+
+        # ディスクから読み込み
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if now - record.get("created_at", 0) > self.ttl_seconds:
+            self._remove_disk(path)
+            return None
+
+        text = record.get("corrected_text")
+        if not isinstance(text, str):
+            return None
+
+        with self._lock:
+            self._store_memory(key, record["created_at"], text)
+        return text
+
+    def put(self, key: str, text: str):
+        """変換結果をメモリとディスクの両方に保存"""
+        created_at = time.time()
+        with self._lock:
+            self._store_memory(key, created_at, text)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._disk_path(key)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"created_at": created_at, "corrected_text": text}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"キャッシュの保存に失敗: {e}")
+
+    def purge_expired(self):
+        """ディスク上の期限切れエントリを削除"""
+        now = time.time()
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                # 保存時刻はファイルの更新時刻で近似する（ファイルを開かずに判定できる）
+                if now - os.path.getmtime(path) > self.ttl_seconds:
+                    self._remove_disk(path)
+            except OSError:
+                continue
+
+    def _store_memory(self, key: str, created_at: float, text: str):
+        """メモリ層に追加し、上限を超えた分を古い順に追い出す（ロック取得済みで呼ぶ）"""
+        size = self._entry_size(key, text)
+        if size > self.memory_limit_bytes:
+            return
+        self._remove_memory(key)
+        self._entries[key] = (created_at, text)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_limit_bytes:
+            old_key, (_, old_text) = self._entries.popitem(last=False)
+            self._memory_bytes -= self._entry_size(old_key, old_text)
+
+    def _remove_memory(self, key: str):
+        """メモリ層からエントリを削除（ロック取得済みで呼ぶ）"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= self._entry_size(key, entry[1])
+
+    @staticmethod
+    def _entry_size(key: str, text: str) -> int:
+        return len(key) + len(text.encode('utf-8'))
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    @staticmethod
+    def _remove_disk(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,67 @@
+"""
+長い入力を文・段落の境界で分割する
+"""
+
+import json
+import re
+from typing import List, Tuple
+
+
+# 文の終わりとみなす文字と、その直後に続けてよい閉じ括弧類
+SENTENCE_END_PATTERN = re.compile(r'[^。！？!?]*[。！？!?]+[」』）)\]]*|[^。！？!?]+\Z')
+PARAGRAPH_SEPARATOR_PATTERN = re.compile(r'(\n[ \t\u3000]*\n\s*)')
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[Tuple[str, str]]:
+    """文・段落の境界で入力を分割する
+
+    戻り値は (チャンク本文, 直後の区切り文字列) のリスト。区切りを含めて結合すると元の文章に戻る
+    """
+    chunks: List[Tuple[str, str]] = []
+    parts = PARAGRAPH_SEPARATOR_PATTERN.split(text)
+    # parts は [段落, 区切り, 段落, 区切り, ...] の並びになる
+    for index in range(0, len(parts), 2):
+        paragraph = parts[index]
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        if not paragraph:
+            if chunks:
+                text_part, prev_separator = chunks[-1]
+                chunks[-1] = (text_part, prev_separator + separator)
+            continue
+
+        pieces = split_paragraph(paragraph, max_chars)
+        chunks.extend((piece, "") for piece in pieces[:-1])
+        chunks.append((pieces[-1], separator))
+    return chunks
+
+
+def split_paragraph(paragraph: str, max_chars: int) -> List[str]:
+    """段落内を文単位でmax_charsまで詰めて分割する（結合すると元の段落に戻る）"""
+    pieces: List[str] = []
+    current = ""
+    for sentence in SENTENCE_END_PATTERN.findall(paragraph):
+        if current and len(current) + len(sentence) > max_chars:
+            pieces.append(current)
+            current = ""
+        current += sentence
+    pieces.append(current)
+    return pieces
+
+
+def build_chunk_messages(chunks: List[Tuple[str, str]], overlap_chars: int) -> List[str]:
+    """各チャンクのユーザーメッセージを、前後の原文を少し添えて作成"""
+    messages = []
+    for index, (chunk, _) in enumerate(chunks):
+        message = {"input_text": chunk}
+        if overlap_chars > 0:
+            if index > 0:
+                message["preceding_context"] = chunks[index - 1][0][-overlap_chars:]
+            if index + 1 < len(chunks):
+                message["following_context"] = chunks[index + 1][0][:overlap_chars]
+        messages.append(json.dumps(message, ensure_ascii=False))
+    return messages
+
+
+def join_chunks(results: List[Tuple[str, bool]], chunks: List[Tuple[str, str]]) -> str:
+    """変換済みチャンクを元の区切り文字列で結合"""
+    return "".join(text + separator for (text, _), (_, separator) in zip(results, chunks))
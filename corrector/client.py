@@ -0,0 +1,131 @@
+"""
+OpenRouter APIのHTTPクライアント
+"""
+
+import json
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .errors import RETRYABLE_STATUS_CODES, APIError, MalformedResponseError
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-Afterヘッダー（秒数またはHTTP日付）を待ち秒数に変換"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def api_error_from_response(response: requests.Response) -> APIError:
+    """エラー応答からAPIErrorを生成（Retry-Afterヘッダーも解釈する）"""
+    status_code = response.status_code
+    return APIError(
+        f"API呼び出しに失敗しました: {status_code}",
+        status_code=status_code,
+        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+        retryable=status_code in RETRYABLE_STATUS_CODES
+    )
+
+
+class OpenRouterClient:
+    """OpenRouter APIへの接続を保持するHTTPクライアント
+
+    コネクションプールとキープアライブにより、変換ごとのTCP/TLSハンドシェイクを省略する
+    """
+
+    DEFAULT_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+    def __init__(self, api_url: str = DEFAULT_API_URL, pool_size: int = 4,
+                 connect_timeout: float = 10.0, read_timeout: float = 30.0):
+        self.api_url = api_url
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "HTTP-Referer": "https://github.com/gpsnmeajp/VOICE_CORRECTOR",
+            "X-Title": "VOICE_CORRECTOR"
+        })
+
+    def post_chat(self, api_key: str, data: Dict) -> requests.Response:
+        """チャット補完リクエストを送信（接続はプールから再利用される）"""
+        return self.session.post(
+            self.api_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            json=data,
+            timeout=self.timeout
+        )
+
+    def stream_chat(self, api_key: str, data: Dict) -> Iterator[str]:
+        """ストリーミング（SSE）でチャット補完を要求し、本文の差分を到着順に返す"""
+        payload = dict(data, stream=True)
+        with self.session.post(
+            self.api_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            json=payload,
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                print("=== デバッグ：APIエラーレスポンス ===")
+                print(f"ステータスコード: {response.status_code}")
+                print(f"レスポンステキスト: {response.text}")
+                print("===============================")
+                raise api_error_from_response(response)
+
+            for raw_line in response.iter_lines():
+                # 空行はイベントの区切り、":"で始まる行はコメント（OPENROUTER PROCESSING等）
+                if not raw_line or raw_line.startswith(b":"):
+                    continue
+                try:
+                    line = raw_line.decode("utf-8")
+                except UnicodeDecodeError:
+                    raise MalformedResponseError("APIからのストリーミング応答がUTF-8ではありません")
+                if not line.startswith("data:"):
+                    continue
+
+                event_data = line[len("data:"):].strip()
+                if event_data == "[DONE]":
+                    break
+
+                try:
+                    event = json.loads(event_data)
+                except json.JSONDecodeError:
+                    raise MalformedResponseError("APIからのストリーミング応答が無効なJSON形式です")
+                if not isinstance(event, dict):
+                    raise MalformedResponseError("APIからのストリーミング応答がJSONオブジェクトではありません")
+
+                if "error" in event:
+                    # ストリーム途中のエラーはcodeにHTTPステータス相当が入る
+                    error = event["error"]
+                    code = error.get("code") if isinstance(error, dict) else None
+                    message = error.get("message", error) if isinstance(error, dict) else error
+                    raise APIError(
+                        f"API呼び出しに失敗しました: {message}",
+                        status_code=code if isinstance(code, int) else None,
+                        retryable=code in RETRYABLE_STATUS_CODES
+                    )
+
+                choices = event.get("choices") or []
+                if choices:
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+
+    def close(self):
+        """プール内の接続をすべて閉じる"""
+        self.session.close()
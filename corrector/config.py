@@ -0,0 +1,79 @@
+"""
+変換エンジンの設定
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+from .client import OpenRouterClient
+from .prepass import DEFAULT_FILLERS
+
+
+# 変換エンジンの設定の既定値（GUIではsettings.jsonに同じキーで保存される）
+DEFAULT_OPTIONS = {
+    "api_url": OpenRouterClient.DEFAULT_API_URL,
+    "http_pool_size": 4,
+    "http_connect_timeout": 10.0,
+    "http_read_timeout": 30.0,
+    "streaming": True,
+    "model": "openai/gpt-5",
+    "temperature": 0.5,
+    "structured_output_enabled": True,
+    "prompt_cache_control": True,
+    "reference_retrieval_enabled": True,
+    "reference_max_chars": 1500,
+    "reference_passage_chars": 200,
+    "reference_top_k": 5,
+    "reference_folder": "reference",
+    "reference_index_enabled": False,
+    "reference_index_path": "reference_index.sqlite3",
+    "response_cache_enabled": True,
+    "response_cache_dir": "response_cache",
+    "response_cache_memory_bytes": 4 * 1024 * 1024,
+    "response_cache_ttl_seconds": 7 * 24 * 60 * 60,
+    "retry_max_attempts": 4,
+    "retry_base_delay": 0.5,
+    "retry_max_delay": 8.0,
+    "retry_deadline": 60.0,
+    "circuit_failure_threshold": 5,
+    "circuit_reset_seconds": 30.0,
+    "chunked_correction_enabled": True,
+    "chunk_threshold_chars": 600,
+    "chunk_max_chars": 300,
+    "chunk_overlap_chars": 40,
+    "chunk_workers": 4,
+    "incremental_correction_enabled": True,
+    "incremental_context_chars": 200,
+    "incremental_memo_entries": 512,
+    "prepass_enabled": True,
+    "prepass_fillers": list(DEFAULT_FILLERS),
+    "noop_detection_enabled": False,
+    "noop_confidence_threshold": 0.9,
+    "noop_max_chars": 80,
+    "noop_user_dictionary": [],
+    "noop_skip_log": "noop_skips.jsonl",
+    "batch_workers": 4,
+    "batch_rate_limit": 0.0,
+    "server_host": "127.0.0.1",
+    "server_port": 8790,
+    "server_max_concurrency": 4,
+    "server_max_queue": 32
+}
+
+
+def make_options(overrides: Optional[Dict] = None) -> Dict:
+    """既定値に指定された設定を上書きした設定を返す"""
+    options = dict(DEFAULT_OPTIONS)
+    if overrides:
+        options.update(overrides)
+    return options
+
+
+def load_settings_file(path: str = "settings.json") -> Dict:
+    """GUIと同じsettings.jsonを読み込み、既定値に上書きした設定を返す（ファイルがなければ既定値）"""
+    overrides = {}
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    return make_options(overrides)
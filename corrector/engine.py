@@ -0,0 +1,679 @@
+"""
+asyncioベースの変換エンジン
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .cache import ResponseCache
+from .chunking import build_chunk_messages, join_chunks, split_into_chunks, split_paragraph
+from .client import OpenRouterClient, api_error_from_response
+from .errors import ConversionCancelled, MalformedResponseError
+from .incremental import ParagraphMemo, build_paragraph_messages, paragraph_key, split_into_paragraphs
+from .noop import NoOpDecision, NoOpDetector
+from .parsing import CorrectedTextStreamParser, ParsePathStats, parse_corrected_text
+from .prepass import Prepass, PrepassResult
+from .prompt import PromptBuilder, SystemPrompt
+from .retrieval import ReferenceRetriever
+from .retry import CircuitBreaker, RetryPolicy, RetryStats
+
+
+class ConversionJob:
+    """1回の変換要求
+
+    入力と変換方針・参考文章をまとめて持ち、変換エンジンに渡される。
+    中止されるとエンジン上のタスクを取り消し、ストリーミング受信中のスレッドも中止を検出できる。
+    結果がキャッシュ由来か、再試行の記録もジョブごとに保持する
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, input_text: str, conversion_policy: str = "", reference_text: str = ""):
+        self.job_id = next(self._ids)
+        self.input_text = input_text
+        self.conversion_policy = conversion_policy
+        self.reference_text = reference_text
+        self.from_cache = False
+        self.retry_stats = RetryStats()
+        self.prepass: Optional[PrepassResult] = None
+        self.skipped: Optional[NoOpDecision] = None
+        self._cancel_event = threading.Event()
+        self._future: Optional[Future] = None
+
+    def attach(self, future: Future):
+        """エンジン上で実行中のタスクを関連付ける"""
+        self._future = future
+        if self.cancelled:
+            future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """変換を中止する（再試行の待機中であればすぐに解除される）"""
+        self._cancel_event.set()
+        if self._future:
+            self._future.cancel()
+
+    def check_cancelled(self):
+        """中止されていればConversionCancelledを送出"""
+        if self._cancel_event.is_set():
+            raise ConversionCancelled(f"変換 #{self.job_id} は中止されました")
+
+
+# structured outputsで指定する応答のスキーマ
+CORRECTED_TEXT_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "corrected_text",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "corrected_text": {"type": "string"}
+            },
+            "required": ["corrected_text"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+class _Flight:
+    """実行中の上流リクエスト（同じ内容のリクエストはこの結果を待って共有する）"""
+
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+        self.listeners: List[Callable[[str], None]] = []
+
+
+class EngineEvent(NamedTuple):
+    """変換エンジンから呼び出し側へ渡すイベント"""
+    kind: str
+    job: ConversionJob
+    payload: object = None
+
+
+class ConversionEngine:
+    """専用スレッドのasyncioイベントループで変換を実行するエンジン
+
+    HTTPクライアント・キャッシュ・再試行・チャンクの並列変換を所有し、tkinterには依存しない。
+    eventsにキューを渡すと、途中経過や結果がスレッドセーフなイベントとして届く。
+    submit()の戻り値のFutureからも結果を受け取れる
+    """
+
+    # イベントの種類
+    PARTIAL = "partial"      # payload: 受信途中の修正結果
+    STATUS = "status"        # payload: 状態表示用のメッセージ
+    DONE = "done"            # payload: 修正結果
+    ERROR = "error"          # payload: 発生した例外
+    CANCELLED = "cancelled"  # payload: なし
+
+    def __init__(self, settings: Dict, events: "Optional[queue.Queue[EngineEvent]]" = None):
+        self.settings = settings
+        self.events = events
+
+        # HTTPクライアント（エンジン終了まで接続を保持）
+        self.http_client = OpenRouterClient(
+            api_url=settings["api_url"],
+            pool_size=settings["http_pool_size"],
+            connect_timeout=settings["http_connect_timeout"],
+            read_timeout=settings["http_read_timeout"]
+        )
+
+        # 変換結果のキャッシュ
+        self.response_cache = ResponseCache(
+            cache_dir=settings["response_cache_dir"],
+            memory_limit_bytes=settings["response_cache_memory_bytes"],
+            ttl_seconds=settings["response_cache_ttl_seconds"]
+        )
+
+        # API呼び出し前のローカル前処理
+        self.prepass = Prepass(settings["prepass_fillers"])
+
+        # 整っている入力でAPIを呼ばないための判定器
+        self.noop_detector = NoOpDetector(
+            user_dictionary=settings["noop_user_dictionary"],
+            threshold=settings["noop_confidence_threshold"],
+            max_chars=settings["noop_max_chars"]
+        )
+
+        # 段落ごとの修正結果（差分変換で変わっていない段落に使う）
+        self.paragraph_memo = ParagraphMemo(max_entries=settings["incremental_memo_entries"])
+
+        # 再試行ポリシーとサーキットブレーカー
+        self.retry_policy = RetryPolicy(
+            max_attempts=settings["retry_max_attempts"],
+            base_delay=settings["retry_base_delay"],
+            max_delay=settings["retry_max_delay"],
+            deadline=settings["retry_deadline"]
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings["circuit_failure_threshold"],
+            reset_seconds=settings["circuit_reset_seconds"]
+        )
+
+        # 起動からの再試行の累計
+        self.total_retries = 0
+        self.total_retry_seconds = 0.0
+
+        # システムプロンプト（変換方針・参考文章の組み合わせごとに組み立て結果を再利用）
+        self.prompt_builder = PromptBuilder()
+
+        # 長い参考文章から入力に近い部分だけを選ぶ検索
+        self.reference_retriever = ReferenceRetriever(
+            passage_chars=settings["reference_passage_chars"],
+            max_chars=settings["reference_max_chars"],
+            top_k=settings["reference_top_k"]
+        )
+
+        # 参考フォルダ全体のディスク上の索引（更新はrefresh_reference_indexを呼んだときだけ行う）
+        self.reference_index = None
+        if settings["reference_index_enabled"]:
+            # sqlite3は索引を使う設定のときだけ読み込む（--pipeなどの起動を遅くしないように）
+            import sqlite3
+            from .reference_index import ReferenceFolderIndex
+            try:
+                self.reference_index = ReferenceFolderIndex(
+                    settings["reference_index_path"], settings["reference_folder"],
+                    passage_chars=settings["reference_passage_chars"])
+            except sqlite3.Error as e:
+                print(f"参考フォルダの索引を開けませんでした: {e}")
+
+        # 応答の解析で使われた経路の回数
+        self.parse_stats = ParsePathStats()
+
+        # 実行中の上流リクエスト（キャッシュキー -> _Flight）と、共有により節約できた呼び出しの累計
+        self._flights: Dict[str, _Flight] = {}
+        self.coalesced_requests = 0
+
+        # requestsはブロッキングなので、通信は接続プールと同じ数のスレッドで実行する
+        self._io_executor = ThreadPoolExecutor(max_workers=settings["http_pool_size"],
+                                               thread_name_prefix="engine-io")
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="conversion-engine", daemon=True)
+        self._thread.start()
+
+        # 参考フォルダの索引の更新は、通信を妨げないよう専用のスレッドで1つずつ行う
+        self._index_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="engine-index")
+
+        self._io_executor.submit(self.response_cache.purge_expired)
+
+    def refresh_reference_index(self, found: Optional[Dict[str, Tuple[float, int]]] = None) -> Optional[Future]:
+        """参考フォルダの索引を別スレッドで更新する（索引を使わない設定ならNone）
+
+        foundには参考フォルダの監視で得たファイル一覧を渡せる（省略するとフォルダを調べ直す）
+        """
+        if self.reference_index is None:
+            return None
+        return self._index_executor.submit(self._refresh_reference_index, found)
+
+    def _refresh_reference_index(self, found: Optional[Dict[str, Tuple[float, int]]]):
+        import sqlite3
+        try:
+            self.reference_index.refresh(found)
+        except sqlite3.Error as e:
+            print(f"参考フォルダの索引の更新に失敗: {e}")
+
+    def _run_loop(self):
+        """イベントループスレッドの本体"""
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, job: ConversionJob) -> Future:
+        """変換ジョブを登録（すぐに戻る。結果はeventsと戻り値のFutureに届く）"""
+        future = asyncio.run_coroutine_threadsafe(self._run_job(job), self._loop)
+        job.attach(future)
+        return future
+
+    def correct_sync(self, job: ConversionJob, timeout: Optional[float] = None) -> str:
+        """変換ジョブを実行し、完了するまで待って修正結果を返す"""
+        try:
+            return self.submit(job).result(timeout)
+        except CancelledError:
+            raise ConversionCancelled(f"変換 #{job.job_id} は中止されました")
+
+    def __enter__(self) -> "ConversionEngine":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """実行中のジョブを取り消してイベントループを止め、接続を閉じる"""
+        async def cancel_all():
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if self._thread.is_alive():
+            try:
+                asyncio.run_coroutine_threadsafe(cancel_all(), self._loop).result(timeout=1.0)
+            except Exception as e:
+                print(f"変換ジョブの取り消しに失敗: {e}")
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=1.0)
+        self._io_executor.shutdown(wait=False)
+        self.http_client.close()
+        # 待っている索引の更新は取り消し、実行中の更新が打ち切られるのを待ってから閉じる
+        self._index_executor.shutdown(wait=False, cancel_futures=True)
+        if self.reference_index is not None:
+            self.reference_index.close()
+
+    def _emit(self, kind: str, job: ConversionJob, payload: object = None):
+        """イベントキューがあればイベントを通知（どのスレッドからでも呼べる）"""
+        if self.events is not None:
+            self.events.put(EngineEvent(kind, job, payload))
+
+    async def _run_job(self, job: ConversionJob) -> str:
+        """ジョブを実行し、結果をイベントとして通知"""
+        try:
+            corrected_text = await self.correct(job)
+        except (asyncio.CancelledError, ConversionCancelled):
+            print(f"変換 #{job.job_id} は中止されました")
+            self._emit(self.CANCELLED, job)
+            raise
+        except Exception as e:
+            self._emit(self.ERROR, job, e)
+            raise
+        self._emit(self.DONE, job, corrected_text)
+        return corrected_text
+
+    async def correct(self, job: ConversionJob) -> str:
+        """OpenRouter APIを呼び出して文章を修正
+
+        ストリーミング有効時は、受信途中のcorrected_textをPARTIALイベントで逐次通知する
+        """
+        api_key = os.getenv('OPENROUTER_API_KEY')
+        if not api_key:
+            raise ValueError("OPENROUTER_API_KEY環境変数が設定されていません")
+
+        # フィラーや言い直しなど、規則で直せるものは送信前に取り除く
+        input_text = job.input_text
+        if self.settings["prepass_enabled"]:
+            job.prepass = self.prepass.apply(input_text)
+            input_text = job.prepass.text
+            print(f"=== デバッグ：前処理でフィラー{job.prepass.removed_fillers}個・言い直し{job.prepass.removed_repeats}個を除去"
+                  f"（{job.prepass.saved_chars}文字, 推定{job.prepass.saved_tokens}トークン削減） ===")
+            if not input_text:
+                # フィラーだけの入力は空の結果を返す（job.prepassから理由がわかるので、表示側で警告する）
+                print("=== デバッグ：前処理の結果、変換する文章が残りませんでした ===")
+                return ""
+
+        # すでに整っている短い入力は、APIを呼ばずにそのまま（または前処理だけして）返す
+        if self.settings["noop_detection_enabled"]:
+            decision = self.noop_detector.assess(input_text)
+            if decision.skip:
+                job.skipped = decision
+                print(f"=== デバッグ：API呼び出しを省略（確信度 {decision.confidence}, {', '.join(decision.reasons)}） ===")
+                await asyncio.get_running_loop().run_in_executor(
+                    self._io_executor, self._log_skip, job, input_text, decision)
+                return input_text
+
+        # 複数段落の長い入力は、前回から変わった段落だけを変換する
+        if (self.settings["incremental_correction_enabled"]
+                and len(input_text) >= self.settings["chunk_threshold_chars"]):
+            paragraphs = split_into_paragraphs(input_text)
+            if len(paragraphs) > 1:
+                system_prompt = await self._build_system_prompt(job, input_text, chunked=True)
+                return await self._correct_incrementally(api_key, system_prompt, paragraphs, job)
+
+        # 長い入力は文・段落の境界で分割し、並列に変換する
+        if (self.settings["chunked_correction_enabled"]
+                and len(input_text) >= self.settings["chunk_threshold_chars"]):
+            chunks = split_into_chunks(input_text, self.settings["chunk_max_chars"])
+            if len(chunks) > 1:
+                system_prompt = await self._build_system_prompt(job, input_text, chunked=True)
+                return await self._correct_chunks(api_key, system_prompt, chunks, job)
+
+        system_prompt = await self._build_system_prompt(job, input_text)
+
+        # ユーザーメッセージには入力テキストのみを含める
+        user_message = json.dumps({"input_text": input_text}, ensure_ascii=False)
+
+        corrected_text, job.from_cache = await self._request_correction(
+            api_key, system_prompt, user_message, job, job.retry_stats,
+            on_partial=lambda text: self._emit(self.PARTIAL, job, text))
+        return corrected_text
+
+    async def _build_system_prompt(self, job: ConversionJob, input_text: str,
+                                   chunked: bool = False) -> SystemPrompt:
+        """システムプロンプトを組み立てる（長い参考文章は入力に近い部分だけに絞り込む）"""
+        reference_text = job.reference_text
+        if (self.settings["reference_retrieval_enabled"]
+                and len(reference_text) > self.settings["reference_max_chars"]):
+            # 索引の検索・作成はイベントループを止めないよう別スレッドで行う
+            reference_text = await asyncio.get_running_loop().run_in_executor(
+                self._io_executor, self._retrieve_reference, job, input_text)
+        system_prompt = self.prompt_builder.build(job.conversion_policy, reference_text, chunked=chunked,
+                                                  reference_trimmed=reference_text != job.reference_text)
+
+        saved_chars = len(job.reference_text) - len(reference_text)
+        if saved_chars > 0:
+            original_chars = len(system_prompt.text) + saved_chars
+            print(f"=== デバッグ：参考文章を{len(job.reference_text)}文字から{len(reference_text)}文字に絞り込み"
+                  f"（プロンプト {original_chars}→{len(system_prompt.text)}文字, {saved_chars / original_chars:.0%}削減） ===")
+        return system_prompt
+
+    def _retrieve_reference(self, job: ConversionJob, input_text: str) -> str:
+        """参考文章から入力に近い部分を選ぶ（参考フォルダのファイルそのままなら、ディスク上の索引から検索する）"""
+        if len(job.reference_text) <= self.settings["reference_max_chars"]:
+            return job.reference_text
+        if self.reference_index is not None:
+            import sqlite3
+            try:
+                path = self.reference_index.find(job.reference_text)
+                if path is not None:
+                    selected = self.reference_index.select(input_text, self.settings["reference_max_chars"],
+                                                           self.settings["reference_top_k"], path=path)
+                    # 選べなかった場合は、参考セクションを空にせずメモリ上の索引で選び直す
+                    if selected:
+                        return selected
+            except sqlite3.Error as e:
+                print(f"参考フォルダの索引の検索に失敗: {e}")
+        return self.reference_retriever.retrieve(job.reference_text, input_text)
+
+    def _log_skip(self, job: ConversionJob, output_text: str, decision: NoOpDecision):
+        """APIを省略した変換を記録（誤って省略した割合を後で確認できるように）"""
+        record = {
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "input_text": job.input_text,
+            "output_text": output_text,
+            "normalized": output_text != job.input_text,
+            "confidence": decision.confidence,
+            "reasons": decision.reasons
+        }
+        try:
+            with open(self.settings["noop_skip_log"], 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"省略の記録に失敗: {e}")
+
+    async def _request_correction(self, api_key: str, system_prompt: SystemPrompt, user_message: str,
+                                  job: ConversionJob, stats: RetryStats,
+                                  on_partial: Optional[Callable[[str], None]] = None) -> Tuple[str, bool]:
+        """1件のリクエストを送信して修正結果を返す（戻り値は (修正結果, キャッシュから返したか)）"""
+        # デバッグ用：送信直前のプロンプトを表示
+        print("=== デバッグ：送信データ ===")
+        print("【システムプロンプト】")
+        print(system_prompt.text)
+        print("\n【ユーザーメッセージ】")
+        print(user_message)
+        print("=========================")
+
+        # APIリクエストを作成
+        data = {
+            "model": self.settings["model"],
+            "messages": [
+                {"role": "system", "content": system_prompt.message_content(self.settings["prompt_cache_control"])},
+                {"role": "user", "content": user_message}
+            ],
+            "temperature": self.settings["temperature"]
+        }
+        # 対応するモデルには、応答をcorrected_textだけのJSONに限定するスキーマを指定する
+        if self.settings["structured_output_enabled"]:
+            data["response_format"] = CORRECTED_TEXT_RESPONSE_FORMAT
+
+        loop = asyncio.get_running_loop()
+
+        # キャッシュにあればネットワークを使わずに返す
+        cache_key = ResponseCache.make_key(system_prompt.key, user_message, data["model"], data["temperature"])
+        if self.settings["response_cache_enabled"]:
+            cached_text = await loop.run_in_executor(self._io_executor, self.response_cache.get, cache_key)
+            if cached_text is not None:
+                print("=== デバッグ：キャッシュヒット ===")
+                return cached_text, True
+
+        # 同じ内容のリクエストが実行中なら、上流には送らずその結果を共有する（single-flight）
+        flight = self._flights.get(cache_key)
+        while flight is not None:
+            if on_partial is not None:
+                flight.listeners.append(on_partial)
+            try:
+                await flight.done.wait()
+            finally:
+                if on_partial is not None:
+                    flight.listeners.remove(on_partial)
+            if flight.error is None:
+                self.coalesced_requests += 1
+                print(f"=== デバッグ：実行中の同じリクエストの結果を共有（累計 {self.coalesced_requests}回の呼び出しを節約） ===")
+                return flight.result, False
+            if not isinstance(flight.error, (asyncio.CancelledError, ConversionCancelled)):
+                raise flight.error
+            # 先に送った側が中止されただけなら、自分で送り直す
+            job.check_cancelled()
+            flight = self._flights.get(cache_key)
+
+        flight = _Flight()
+        if on_partial is not None:
+            flight.listeners.append(on_partial)
+        self._flights[cache_key] = flight
+
+        def notify_partial(text: str):
+            for listener in list(flight.listeners):
+                listener(text)
+
+        try:
+            flight.result = await self._fetch_correction(api_key, data, cache_key, job, stats, notify_partial)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            del self._flights[cache_key]
+            flight.done.set()
+        return flight.result, False
+
+    async def _fetch_correction(self, api_key: str, data: Dict, cache_key: str, job: ConversionJob,
+                                stats: RetryStats, on_partial: Callable[[str], None]) -> str:
+        """上流にリクエストを送り（失敗時は再試行）、修正結果をキャッシュに保存して返す"""
+        loop = asyncio.get_running_loop()
+
+        def request_content() -> str:
+            if self.settings["streaming"]:
+                # ストリーミングで受信しながら途中経過を通知
+                return self._receive_streaming(api_key, data, job, on_partial)
+            return self._receive_complete(api_key, data)
+
+        def on_retry(attempt: int, delay: float, error: Exception):
+            self._emit(self.STATUS, job, f"変換中... 再試行します（{attempt}回失敗、{delay:.1f}秒後）")
+
+        # 一時的な失敗は再試行する（障害が続く場合はブレーカーで即座に失敗）
+        try:
+            content = await self.retry_policy.run(
+                lambda: loop.run_in_executor(self._io_executor, request_content),
+                stats, self.circuit_breaker, on_retry)
+        finally:
+            self.total_retries += stats.retries
+            self.total_retry_seconds += stats.retry_seconds
+            if stats.retries:
+                print(f"=== デバッグ：{stats}（累計 {self.total_retries}回, {self.total_retry_seconds:.1f}秒） ===")
+
+        # JSON応答をパース（スキーマ非対応のモデルでは、マークダウンやコードブロック内のJSONにも対応）
+        corrected_text = parse_corrected_text(content, self.settings["structured_output_enabled"],
+                                              self.parse_stats)
+        print(f"=== デバッグ：応答の解析経路（累計） {self.parse_stats} ===")
+
+        if self.settings["response_cache_enabled"]:
+            await loop.run_in_executor(self._io_executor, self.response_cache.put, cache_key, corrected_text)
+        return corrected_text
+
+    async def _correct_chunks(self, api_key: str, system_prompt: SystemPrompt,
+                              chunks: List[Tuple[str, str]], job: ConversionJob) -> str:
+        """分割したチャンクを並列に変換し、元の順序で結合する"""
+        overlap = self.settings["chunk_overlap_chars"]
+        messages = build_chunk_messages(chunks, overlap)
+        print(f"=== デバッグ：{len(chunks)}個のチャンクに分割して並列変換 ===")
+
+        results: List[Optional[Tuple[str, bool]]] = [None] * len(chunks)
+        await self._correct_parts(api_key, system_prompt, chunks,
+                                  dict(enumerate(messages)), results, job)
+        return join_chunks(results, chunks)
+
+    async def _correct_incrementally(self, api_key: str, system_prompt: SystemPrompt,
+                                     paragraphs: List[Tuple[str, str]], job: ConversionJob) -> str:
+        """前回から変わった段落だけを変換し、変わっていない段落はメモの結果を使って結合する"""
+        # 参考文章の絞り込み結果は入力全体に応じて変わるため、メモのキーには絞り込む前の変換条件を使う
+        conditions_key = self.prompt_builder.build(job.conversion_policy, job.reference_text, chunked=True).key
+        keys = [paragraph_key(paragraph, conditions_key, self.settings["model"], self.settings["temperature"])
+                for paragraph, _ in paragraphs]
+        corrected = [self.paragraph_memo.get(key) for key in keys]
+        changed = [index for index, text in enumerate(corrected) if text is None]
+
+        # 変わった段落のうち長いものは、分割変換と同じく文の境界でchunk_max_charsまでに分ける
+        max_chars = self.settings["chunk_max_chars"] if self.settings["chunked_correction_enabled"] else 0
+        parts: List[Tuple[str, str]] = []
+        owners: List[int] = []
+        for index, (paragraph, separator) in enumerate(paragraphs):
+            if corrected[index] is None and max_chars and len(paragraph) > max_chars:
+                pieces = split_paragraph(paragraph, max_chars)
+            else:
+                pieces = [paragraph]
+            parts.extend((piece, "") for piece in pieces[:-1])
+            parts.append((pieces[-1], separator))
+            owners.extend([index] * len(pieces))
+        part_corrected = [corrected[owner] for owner in owners]
+        changed_parts = [index for index, text in enumerate(part_corrected) if text is None]
+        print(f"=== デバッグ：{len(paragraphs)}段落のうち{len(paragraphs) - len(changed)}段落は前回の結果を再利用、"
+              f"{len(changed)}段落を{len(changed_parts)}回に分けて変換 ===")
+
+        results: List[Optional[Tuple[str, bool]]] = [
+            (text, True) if text is not None else None for text in part_corrected]
+        messages = build_paragraph_messages(parts, part_corrected, changed_parts,
+                                            self.settings["incremental_context_chars"])
+
+        def remember(index: int, text: str):
+            # 段落のすべての部分が変換できたら、段落単位でメモに保存
+            owner = owners[index]
+            members = [part for part, part_owner in enumerate(owners) if part_owner == owner]
+            if all(results[part] is not None for part in members):
+                self.paragraph_memo.put(keys[owner], "".join(results[part][0] for part in members))
+
+        await self._correct_parts(api_key, system_prompt, parts,
+                                  dict(zip(changed_parts, messages)), results, job, on_result=remember)
+        return join_chunks(results, parts)
+
+    async def _correct_parts(self, api_key: str, system_prompt: SystemPrompt, chunks: List[Tuple[str, str]],
+                             messages: Dict[int, str], results: List[Optional[Tuple[str, bool]]],
+                             job: ConversionJob, on_result: Optional[Callable[[int, str], None]] = None):
+        """messagesに含まれる部分を並列に変換してresultsを埋める（済んでいる部分はそのまま）"""
+        stats_list = {index: RetryStats() for index in messages}
+        shown_count = 0
+        semaphore = asyncio.Semaphore(self.settings["chunk_workers"])
+
+        def show_ready_prefix():
+            # 先頭から連続して完了した部分までを途中経過として表示
+            nonlocal shown_count
+            ready_count = shown_count
+            while ready_count < len(results) and results[ready_count] is not None:
+                ready_count += 1
+            if ready_count > shown_count:
+                shown_count = ready_count
+                self._emit(self.PARTIAL, job, join_chunks(results[:shown_count], chunks))
+
+        async def correct_part(index: int, message: str):
+            async with semaphore:
+                results[index] = await self._request_correction(
+                    api_key, system_prompt, message, job, stats_list[index])
+            if on_result is not None:
+                on_result(index, results[index][0])
+            show_ready_prefix()
+
+        show_ready_prefix()
+        tasks = [asyncio.ensure_future(correct_part(index, message))
+                 for index, message in messages.items()]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # 1つでも失敗（または中止）したら残りの部分も取り消す
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # 再試行の記録を集約
+        merged = RetryStats()
+        for stats in stats_list.values():
+            merged.attempts += stats.attempts
+            merged.retries += stats.retries
+            merged.retry_seconds = max(merged.retry_seconds, stats.retry_seconds)
+        job.retry_stats = merged
+        job.from_cache = all(cached for _, cached in results)
+
+    def _receive_complete(self, api_key: str, data: Dict) -> str:
+        """応答全体を一括で受信し、content部分を返す"""
+        # APIを呼び出し（プール済みの接続を再利用）
+        response = self.http_client.post_chat(api_key, data)
+
+        if response.status_code != 200:
+            # エラーレスポンスもデバッグ出力
+            print("=== デバッグ：APIエラーレスポンス ===")
+            print(f"ステータスコード: {response.status_code}")
+            print(f"レスポンステキスト: {response.text}")
+            print("===============================")
+            raise api_error_from_response(response)
+
+        try:
+            result = response.json()
+
+            # 成功レスポンス全体をデバッグ出力
+            print("=== デバッグ：APIレスポンス全体 ===")
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+            print("==============================")
+
+        except json.JSONDecodeError:
+            print("=== デバッグ：JSONパースエラー ===")
+            print(f"レスポンステキスト: {response.text}")
+            print("=============================")
+            raise MalformedResponseError("APIからの応答が無効なJSON形式です", status_code=response.status_code)
+
+        if not isinstance(result, dict) or not result.get('choices'):
+            raise MalformedResponseError("APIからの応答にchoicesが含まれていません", status_code=response.status_code)
+
+        try:
+            content = result['choices'][0]['message']['content']
+        except (KeyError, IndexError, TypeError):
+            raise MalformedResponseError("APIからの応答にmessage.contentが含まれていません",
+                                         status_code=response.status_code)
+
+        # レスポンスの中身（content部分）も詳細出力
+        print("=== デバッグ：レスポンス内容詳細 ===")
+        print(f"content: {content}")
+        print("===============================")
+
+        return content
+
+    def _receive_streaming(self, api_key: str, data: Dict, job: ConversionJob,
+                           on_partial: Optional[Callable[[str], None]]) -> str:
+        """SSEで応答を受信し、途中経過をon_partialに通知しながらcontent全体を返す
+
+        中止されたら受信を打ち切り、接続を閉じる
+        """
+        parser = CorrectedTextStreamParser()
+        chunks = []
+        stream = self.http_client.stream_chat(api_key, data)
+        try:
+            for delta in stream:
+                job.check_cancelled()
+                chunks.append(delta)
+                # 新しく確定した部分があるときだけ表示を更新
+                if parser.feed(delta) and on_partial:
+                    on_partial(parser.text)
+        finally:
+            stream.close()
+        content = "".join(chunks)
+
+        print("=== デバッグ：ストリーミング受信内容 ===")
+        print(f"content: {content}")
+        print("===================================")
+        return content
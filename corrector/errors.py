@@ -0,0 +1,36 @@
+"""
+変換処理で発生する例外
+"""
+
+from typing import Optional
+
+
+# 再試行すれば成功する可能性があるHTTPステータス
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class APIError(Exception):
+    """API呼び出しの失敗（ステータスコードと再試行の可否を保持する）"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+class CircuitOpenError(APIError):
+    """サーキットブレーカーが開いているため、呼び出しを行わずに失敗した"""
+
+
+class MalformedResponseError(APIError):
+    """APIの応答がチャット補完の形式になっていない（JSONでない、choicesがないなど）"""
+
+
+class ResponseParseError(Exception):
+    """モデルの応答からcorrected_textを取り出せなかった"""
+
+
+class ConversionCancelled(Exception):
+    """変換が中止された、または新しい変換に置き換えられた"""
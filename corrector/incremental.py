@@ -0,0 +1,94 @@
+"""
+段落単位の差分変換
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from .chunking import PARAGRAPH_SEPARATOR_PATTERN
+
+
+def split_into_paragraphs(text: str) -> List[Tuple[str, str]]:
+    """空行で入力を段落に分割する
+
+    戻り値は (段落本文, 直後の区切り文字列) のリスト。区切りを含めて結合すると元の文章に戻る
+    """
+    paragraphs: List[Tuple[str, str]] = []
+    leading = ""
+    parts = PARAGRAPH_SEPARATOR_PATTERN.split(text)
+    for index in range(0, len(parts), 2):
+        paragraph = parts[index]
+        separator = parts[index + 1] if index + 1 < len(parts) else ""
+        if not paragraph:
+            if paragraphs:
+                text_part, prev_separator = paragraphs[-1]
+                paragraphs[-1] = (text_part, prev_separator + separator)
+            else:
+                # 先頭の空行は最初の段落に含める
+                leading += separator
+            continue
+        paragraphs.append((leading + paragraph, separator))
+        leading = ""
+    if leading:
+        paragraphs.append((leading, ""))
+    return paragraphs
+
+
+def paragraph_key(paragraph: str, prompt_key: str, model: str, temperature: float) -> str:
+    """段落の内容と変換条件からメモのキー（SHA-256）を生成
+
+    前後の段落はキーに含めないため、周りを編集しても変わっていない段落は再利用される
+    """
+    material = json.dumps([paragraph, prompt_key, model, temperature], ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def build_paragraph_messages(paragraphs: List[Tuple[str, str]], corrected: List[Optional[str]],
+                             indices: List[int], context_chars: int) -> List[str]:
+    """変更された段落のユーザーメッセージを、前後の段落を添えて作成
+
+    前後の段落は修正済みの結果があればそれを、なければ原文を文脈として使う
+    """
+    def neighbour(index: int) -> str:
+        return corrected[index] if corrected[index] is not None else paragraphs[index][0]
+
+    messages = []
+    for index in indices:
+        message = {"input_text": paragraphs[index][0]}
+        if context_chars > 0:
+            if index > 0:
+                message["preceding_context"] = neighbour(index - 1)[-context_chars:]
+            if index + 1 < len(paragraphs):
+                message["following_context"] = neighbour(index + 1)[:context_chars]
+        messages.append(json.dumps(message, ensure_ascii=False))
+    return messages
+
+
+class ParagraphMemo:
+    """段落ごとの修正結果のメモ（件数で上限を設けたLRU）
+
+    変換エンジンのイベントループからのみ使う
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        """修正結果を取得（なければNone）"""
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+        return text
+
+    def put(self, key: str, text: str):
+        """修正結果を保存し、上限を超えた古いものから捨てる"""
+        self._entries[key] = text
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
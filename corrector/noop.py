@@ -0,0 +1,75 @@
+"""
+API呼び出しが不要な入力（すでに整っている短い文）の判定
+"""
+
+import re
+from typing import Iterable, List, NamedTuple
+
+
+# 整った文に普通に現れる文字（かな・漢字・英数字・一般的な句読点と括弧）
+_KNOWN_GOOD_PATTERN = re.compile(
+    r'[ぁ-ゟ゠-ヿ㐀-䶿一-鿿々〆ー'
+    r'A-Za-z0-9０-９Ａ-Ｚａ-ｚ'
+    r'、。，．！？「」『』（）・：〜,.!?\'"%/:()\- ]*')
+_TERMINAL_PATTERN = re.compile(r'[。．！？!?][」』）)]*$')
+_PUNCTUATION_PATTERN = re.compile(r'[、。，．！？,.!?]')
+# 日本語の文字に隣接する空白（音声入力で紛れ込みやすい）
+_STRAY_SPACE_PATTERN = re.compile(r'[^\x00-\x7F] | [^\x00-\x7F]')
+
+# 句読点がこの文字数に1つ以上あれば十分とみなす
+_PUNCTUATION_SPAN_CHARS = 40
+
+
+class NoOpDecision(NamedTuple):
+    """判定結果（skipがTrueならAPIを呼ばずに入力をそのまま使う）"""
+    skip: bool
+    confidence: float
+    reasons: List[str]
+
+
+class NoOpDetector:
+    """すでに整っている入力を見分ける簡易な判定器
+
+    特徴ごとの点数を合計して確信度（0〜1）とし、しきい値以上ならAPIを呼ばない
+    """
+
+    # 特徴ごとの点数（合計1.0）
+    WEIGHTS = {
+        "known_characters": 0.3,
+        "terminal_punctuation": 0.3,
+        "punctuation_density": 0.2,
+        "no_stray_spaces": 0.2,
+    }
+
+    def __init__(self, user_dictionary: Iterable[str] = (), threshold: float = 0.9, max_chars: int = 80):
+        self.user_dictionary = {word.strip() for word in user_dictionary if word.strip()}
+        self.threshold = threshold
+        self.max_chars = max_chars
+
+    def assess(self, text: str) -> NoOpDecision:
+        """入力がそのまま使えるかを判定"""
+        text = text.strip()
+        if not text or len(text) > self.max_chars:
+            return NoOpDecision(False, 0.0, [])
+
+        # ユーザー辞書に登録された文はそのまま使う
+        if text in self.user_dictionary or _TERMINAL_PATTERN.sub("", text) in self.user_dictionary:
+            return NoOpDecision(True, 1.0, ["user_dictionary"])
+
+        # 辞書の語は記号などを含んでいても既知の文字として扱う
+        remainder = text
+        for word in self.user_dictionary:
+            remainder = remainder.replace(word, "")
+
+        reasons = []
+        if _KNOWN_GOOD_PATTERN.fullmatch(remainder):
+            reasons.append("known_characters")
+        if _TERMINAL_PATTERN.search(text):
+            reasons.append("terminal_punctuation")
+        if len(_PUNCTUATION_PATTERN.findall(text)) * _PUNCTUATION_SPAN_CHARS >= len(text):
+            reasons.append("punctuation_density")
+        if not _STRAY_SPACE_PATTERN.search(text):
+            reasons.append("no_stray_spaces")
+
+        confidence = round(sum(self.WEIGHTS[reason] for reason in reasons), 3)
+        return NoOpDecision(confidence >= self.threshold, confidence, reasons)
@@ -0,0 +1,316 @@
+"""
+モデルの応答からcorrected_textを取り出すパーサー
+"""
+
+import json
+import re
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .errors import ResponseParseError
+
+
+# 走査で位置を調べる文字（どちらも1文字の文字クラスなのでバックトラックは起きない）
+_SPECIAL_PATTERN = re.compile(r'["\\]')
+_STRUCTURE_PATTERN = re.compile(r'[{}"\\]')
+
+
+class CorrectedTextStreamParser:
+    """ストリーミング受信中の応答からcorrected_textの値を逐次デコードするパーサー
+
+    チャンクを受け取るたびに前回の続きから走査するため、受信済みのバッファを再走査しない
+    """
+
+    TARGET_KEY = "corrected_text"
+
+    # 走査状態
+    _SEEK = 0         # 文字列トークンを探している
+    _KEY = 1          # 文字列トークン（キー候補）を読んでいる
+    _KEY_ESCAPE = 2   # キー候補内のエスケープ直後
+    _AFTER_KEY = 3    # "corrected_text" の直後で ":" を待っている
+    _AFTER_COLON = 4  # ":" の直後で値の開始 '"' を待っている
+    _VALUE = 5        # 値の文字列を読んでいる
+    _ESCAPE = 6       # 値内のエスケープ直後
+    _UNICODE = 7      # 値内の \uXXXX を読んでいる
+    _DONE = 8         # 値の終端まで読み終えた
+
+    _ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self._state = self._SEEK
+        self._key_chars: List[str] = []
+        self._hex_text = ""
+        self._pending_high_surrogate = ""
+        self._parts: List[str] = []
+        self._text_cache: Optional[str] = ""
+
+    @property
+    def done(self) -> bool:
+        """corrected_textの値を最後まで読み終えたかどうか"""
+        return self._state == self._DONE
+
+    @property
+    def text(self) -> str:
+        """これまでにデコードしたcorrected_textの値"""
+        if self._text_cache is None:
+            self._text_cache = "".join(self._parts)
+        return self._text_cache
+
+    def feed(self, chunk: str) -> str:
+        """チャンクを追加し、新たに確定した値の文字列を返す"""
+        emitted: List[str] = []
+        i = 0
+        length = len(chunk)
+
+        while i < length and self._state != self._DONE:
+            state = self._state
+
+            if state == self._SEEK:
+                pos = chunk.find('"', i)
+                if pos < 0:
+                    break
+                self._key_chars = []
+                self._state = self._KEY
+                i = pos + 1
+
+            elif state == self._KEY:
+                # 閉じ引用符かエスケープまでまとめて読む
+                end = self._find_special(chunk, i)
+                if len(self._key_chars) <= len(self.TARGET_KEY):
+                    self._key_chars.append(chunk[i:end])
+                if end >= length:
+                    break
+                if chunk[end] == '\\':
+                    self._state = self._KEY_ESCAPE
+                elif "".join(self._key_chars) == self.TARGET_KEY:
+                    self._state = self._AFTER_KEY
+                else:
+                    self._state = self._SEEK
+                i = end + 1
+
+            elif state == self._KEY_ESCAPE:
+                # キーにエスケープが含まれる場合は対象外として扱う
+                self._key_chars.append("\\" + chunk[i])
+                self._state = self._KEY
+                i += 1
+
+            elif state in (self._AFTER_KEY, self._AFTER_COLON):
+                ch = chunk[i]
+                if ch.isspace():
+                    i += 1
+                elif state == self._AFTER_KEY and ch == ':':
+                    self._state = self._AFTER_COLON
+                    i += 1
+                elif state == self._AFTER_COLON and ch == '"':
+                    self._state = self._VALUE
+                    i += 1
+                else:
+                    # 期待した並びではないので、この文字から探索をやり直す
+                    self._state = self._SEEK
+
+            elif state == self._VALUE:
+                end = self._find_special(chunk, i)
+                if end > i:
+                    self._emit(chunk[i:end], emitted)
+                if end >= length:
+                    break
+                self._state = self._ESCAPE if chunk[end] == '\\' else self._DONE
+                i = end + 1
+
+            elif state == self._ESCAPE:
+                ch = chunk[i]
+                if ch == 'u':
+                    self._hex_text = ""
+                    self._state = self._UNICODE
+                else:
+                    self._emit(self._ESCAPES.get(ch, ch), emitted)
+                    self._state = self._VALUE
+                i += 1
+
+            elif state == self._UNICODE:
+                take = 4 - len(self._hex_text)
+                self._hex_text += chunk[i:i + take]
+                i += take
+                hex_text = self._hex_text
+                if len(hex_text) == 4:
+                    try:
+                        self._emit(chr(int(hex_text, 16)), emitted)
+                    except ValueError:
+                        self._emit(hex_text, emitted)
+                    self._state = self._VALUE
+
+        if self._state == self._DONE and self._pending_high_surrogate:
+            emitted.append(self._pending_high_surrogate)
+            self._pending_high_surrogate = ""
+
+        new_text = "".join(emitted)
+        if new_text:
+            self._parts.append(new_text)
+            self._text_cache = None
+        return new_text
+
+    def _emit(self, text: str, emitted: List[str]):
+        """デコード済みの文字列を出力（サロゲートペアは結合してから出力）"""
+        if self._pending_high_surrogate:
+            if len(text) == 1 and '\udc00' <= text <= '\udfff':
+                pair = self._pending_high_surrogate + text
+                text = pair.encode('utf-16', 'surrogatepass').decode('utf-16')
+            else:
+                emitted.append(self._pending_high_surrogate)
+            self._pending_high_surrogate = ""
+        if len(text) == 1 and '\ud800' <= text <= '\udbff':
+            self._pending_high_surrogate = text
+            return
+        emitted.append(text)
+
+    @staticmethod
+    def _find_special(chunk: str, start: int) -> int:
+        """start以降で最初の '"' または '\\' の位置を返す（見つからなければ末尾）"""
+        match = _SPECIAL_PATTERN.search(chunk, start)
+        return match.start() if match else len(chunk)
+
+
+def extract_json_response(content: str) -> str:
+    """様々な形式の応答からJSON部分を抽出してcorrected_textを取得"""
+    return _extract_json_response_with_path(content)[0]
+
+
+def _extract_json_response_with_path(content: str) -> Tuple[str, str]:
+    """extract_json_responseの本体（戻り値は (corrected_text, 使われた経路)）
+
+    どの段階も応答を先頭から1回ずつ走査するだけなので、壊れた長い応答でも応答の長さに比例した時間で終わる
+    """
+    # 1. 応答全体をJSONとして解析
+    text = _find_corrected_text(_loads_or_none(content.strip()))
+    if text is not None:
+        return text, "direct_json"
+
+    # 2. 文章やコードブロックに埋め込まれた、括弧の対応が取れたオブジェクトを順に解析
+    path = "code_block" if content.lstrip().startswith('```') else "embedded_object"
+    for candidate in _iter_json_objects(content):
+        if '"corrected_text"' not in candidate:
+            continue
+        text = _find_corrected_text(_loads_or_none(candidate))
+        if text is not None:
+            return text, path
+
+    # 3. JSONとしては壊れているが、"corrected_text": "..." の値は読み取れる場合
+    parser = CorrectedTextStreamParser()
+    parser.feed(content)
+    if parser.done:
+        return parser.text, "value_only"
+
+    # 4. すべて失敗した場合、元のコンテンツを返す（フォールバック）
+    # ただし、明らかにJSON形式でない場合は説明として扱う
+    stripped_content = content.strip()
+    if stripped_content.startswith('{') or stripped_content.startswith('```'):
+        raise ResponseParseError(f"JSON形式の応答を解析できませんでした: {content[:200]}...")
+    else:
+        # プレーンテキストとして返す
+        return stripped_content, "plain_text"
+
+
+def _loads_or_none(text: str) -> object:
+    """JSONとして解析する（解析できなければNone）"""
+    try:
+        return json.loads(text)
+    except (ValueError, RecursionError):
+        return None
+
+
+def _find_corrected_text(value: object) -> Optional[str]:
+    """解析済みのJSONから、文字列のcorrected_textを持つ最も外側のオブジェクトの値を探す"""
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            text = item.get('corrected_text')
+            if isinstance(text, str):
+                return text
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+    return None
+
+
+def _iter_json_objects(content: str) -> Iterator[str]:
+    """波括弧の対応が取れた最も外側のオブジェクトを先頭から順に返す
+
+    文字列内の括弧とエスケープを考慮しつつ、括弧・引用符・バックスラッシュの位置だけを1回走査する
+    """
+    depth = 0
+    start = 0
+    in_string = False
+    escaped_index = -1
+    for match in _STRUCTURE_PATTERN.finditer(content):
+        index = match.start()
+        if index == escaped_index:
+            continue
+        ch = content[index]
+        if in_string:
+            if ch == '\\':
+                escaped_index = index + 1
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            # オブジェクトの外の引用符は地の文として扱う
+            in_string = depth > 0
+        elif ch == '{':
+            if depth == 0:
+                start = index
+            depth += 1
+        elif ch == '}' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                yield content[start:index + 1]
+
+
+def parse_structured_response(content: str) -> Optional[str]:
+    """スキーマ指定（structured outputs）で得た応答をそのまま解析する（形式が違えばNone）"""
+    parsed_result = _loads_or_none(content)
+    if isinstance(parsed_result, dict) and isinstance(parsed_result.get('corrected_text'), str):
+        return parsed_result['corrected_text']
+    return None
+
+
+class ParsePathStats:
+    """応答の解析でどの経路が使われたかの回数"""
+
+    PATHS = ("structured", "direct_json", "code_block", "embedded_object", "value_only",
+             "plain_text", "failed")
+
+    def __init__(self):
+        self.counts: Dict[str, int] = {path: 0 for path in self.PATHS}
+        self._lock = threading.Lock()
+
+    def record(self, path: str):
+        with self._lock:
+            self.counts[path] += 1
+
+    def __str__(self) -> str:
+        return ", ".join(f"{path} {count}" for path, count in self.counts.items() if count)
+
+
+def parse_corrected_text(content: str, structured: bool = False,
+                         stats: Optional[ParsePathStats] = None) -> str:
+    """応答からcorrected_textを取り出す
+
+    structuredがTrueなら、まずスキーマどおりの応答として1回だけ解析する。
+    スキーマに対応していないモデルなどで失敗した場合のみ、従来の段階的な抽出に回す
+    """
+    if structured:
+        text = parse_structured_response(content)
+        if text is not None:
+            if stats is not None:
+                stats.record("structured")
+            return text
+
+    try:
+        text, path = _extract_json_response_with_path(content)
+    except ResponseParseError:
+        if stats is not None:
+            stats.record("failed")
+        raise
+    if stats is not None:
+        stats.record(path)
+    return text
@@ -0,0 +1,52 @@
+"""
+標準入力のテキストを修正して標準出力に書き出すパイプモード
+"""
+
+import contextlib
+import sys
+from typing import Dict
+
+import requests
+
+from .engine import ConversionEngine, ConversionJob
+from .errors import APIError, ResponseParseError
+
+
+# 終了コード（2はargparseが引数エラーに使う）
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_API_ERROR = 3
+EXIT_PARSE_ERROR = 4
+
+
+def run_pipe(settings: Dict) -> int:
+    """標準入力を変換して標準出力に書き出し、終了コードを返す
+
+    変換中のデバッグ表示は標準出力を汚さないよう標準エラー出力に回す
+    """
+    sys.stdin.reconfigure(encoding='utf-8')
+    sys.stdout.reconfigure(encoding='utf-8')
+    input_text = sys.stdin.read().strip()
+    if not input_text:
+        return EXIT_OK
+
+    job = ConversionJob(input_text,
+                        conversion_policy=settings.get("conversion_policy", ""),
+                        reference_text=settings.get("reference_text", ""))
+    try:
+        with contextlib.redirect_stdout(sys.stderr), ConversionEngine(settings) as engine:
+            corrected_text = engine.correct_sync(job)
+    except (APIError, requests.RequestException) as e:
+        print(f"API呼び出しに失敗しました: {e}", file=sys.stderr)
+        return EXIT_API_ERROR
+    except ResponseParseError as e:
+        print(f"応答の解析に失敗しました: {e}", file=sys.stderr)
+        return EXIT_PARSE_ERROR
+    except Exception as e:
+        print(f"変換に失敗しました: {e}", file=sys.stderr)
+        return EXIT_ERROR
+
+    if job.prepass and not job.prepass.text:
+        print("警告: フィラーなどを取り除くと、変換する文章が残りませんでした", file=sys.stderr)
+    print(corrected_text)
+    return EXIT_OK
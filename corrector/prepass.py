@@ -0,0 +1,90 @@
+"""
+API呼び出し前のローカル前処理（フィラー除去・言い直しの重複除去・空白と記号の整理）
+"""
+
+import re
+from typing import Iterable, NamedTuple
+
+
+# 音声入力に多いフィラーの既定の辞書
+DEFAULT_FILLERS = [
+    "えーっと", "えーと", "えっと", "えー",
+    "あのー", "あのう",
+    "そのー",
+    "うーん", "んー",
+]
+
+# フィラーの直前に来てよい文字（行頭・空白・句読点）
+_BOUNDARY_BEFORE = r'(?<![^\s、。，．,.！？!?])'
+# フィラーの直後の条件（伸ばし棒が続くか、句読点・空白・文末が続く）
+# 「あのうちの」「えーっ！」のように、フィラーと同じ文字で始まる語の先頭を削らないようにする
+_BOUNDARY_AFTER = r'(?:[ー〜~]+(?![っッ])|(?=[\s、。，．,.！？!?]|\Z))'
+
+# 読点や空白をはさんで同じ文節（2〜10文字）が続く言い直し（英数字の途中で切れるものは除く）
+# 「今日は、今日は」のように助詞で終わるものだけを対象にし、「バナナ、バナナ、バナナ」のような語の列挙は残す
+# 「もっと、もっと」「ちょっと、ちょっと」のような強調の繰り返しと区別できないため、と・もで終わるものも対象にしない
+_STUTTER_PATTERN = re.compile(
+    r'(?<![^\s、。，．,.！？!?])([^\s、。，．,.！？!?]{1,9}[はがをにでへのね])(?:[、,\s　]+\1)+(?![A-Za-z0-9])')
+_HORIZONTAL_SPACE_PATTERN = re.compile(r'[ \t　]{2,}')
+_TRAILING_SPACE_PATTERN = re.compile(r'[ \t　]+$', re.MULTILINE)
+_LEADING_COMMA_PATTERN = re.compile(r'^[ \t　]*[、，,]+[ \t　]*', re.MULTILINE)
+# 「！！」「？？」は強調として残し、読点と句点の重複だけをまとめる
+_REPEATED_PUNCTUATION_PATTERN = re.compile(r'([、。，．])\1+')
+_COMMA_BEFORE_PERIOD_PATTERN = re.compile(r'[、，]+(?=[。．！？!?])')
+_BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+_ASCII_WORD_PATTERN = re.compile(r'[A-Za-z0-9]+')
+
+
+class PrepassResult(NamedTuple):
+    """前処理の結果"""
+    text: str
+    removed_fillers: int
+    removed_repeats: int
+    saved_chars: int
+    saved_tokens: int
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数のおおまかな見積もり（英数字の語は1語1トークン、それ以外は1文字1トークン）"""
+    ascii_chars = 0
+    ascii_words = 0
+    for match in _ASCII_WORD_PATTERN.finditer(text):
+        ascii_words += 1
+        ascii_chars += len(match.group())
+    return ascii_words + sum(1 for c in text if not c.isspace()) - ascii_chars
+
+
+class Prepass:
+    """決まった規則だけで入力を整える前処理
+
+    正規表現は生成時に1回だけコンパイルし、変換ごとには適用するだけにする
+    """
+
+    def __init__(self, fillers: Iterable[str] = DEFAULT_FILLERS):
+        # 長いフィラーから順に試す（「えーと」より先に「えー」が当たらないように）
+        words = sorted({word for word in fillers if word}, key=len, reverse=True)
+        if words:
+            alternatives = "|".join(re.escape(word) for word in words)
+            self._filler_pattern = re.compile(
+                _BOUNDARY_BEFORE + r'(?:' + alternatives + r')' + _BOUNDARY_AFTER + r'[、，,]?[ \t　]*')
+        else:
+            self._filler_pattern = None
+
+    def apply(self, text: str) -> PrepassResult:
+        """入力に前処理を適用し、結果と削減できた文字数・推定トークン数を返す"""
+        cleaned = text
+        removed_fillers = 0
+        if self._filler_pattern is not None:
+            cleaned, removed_fillers = self._filler_pattern.subn("", cleaned)
+
+        cleaned, removed_repeats = _STUTTER_PATTERN.subn(r'\1', cleaned)
+
+        cleaned = _HORIZONTAL_SPACE_PATTERN.sub(" ", cleaned)
+        cleaned = _TRAILING_SPACE_PATTERN.sub("", cleaned)
+        cleaned = _LEADING_COMMA_PATTERN.sub("", cleaned)
+        cleaned = _REPEATED_PUNCTUATION_PATTERN.sub(r'\1', cleaned)
+        cleaned = _COMMA_BEFORE_PERIOD_PATTERN.sub("", cleaned)
+        cleaned = _BLANK_LINES_PATTERN.sub("\n\n", cleaned).strip()
+        return PrepassResult(cleaned, removed_fillers, removed_repeats,
+                             saved_chars=len(text) - len(cleaned),
+                             saved_tokens=estimate_tokens(text) - estimate_tokens(cleaned))
@@ -0,0 +1,165 @@
+"""
+システムプロンプトの組み立て
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Union
+
+
+# システムプロンプト（基本部分）。プロバイダー側のプロンプトキャッシュが効くよう、常に同じ内容で先頭に置く
+STATIC_SYSTEM_PROMPT = """あなたは、音声入力されたテキストを修正・校正する専門家です。
+あなたのタスクは、与えられた入力テキストを、文法的かつ文脈的に自然で正しい日本語の文章に変換することです。
+入力されている情報には誤認識や余計な記号などが含まれる可能性があります。
+
+以下のテンプレートに従って、入力を解釈し、出力を生成してください。
+
+-----
+
+### **入力テンプレート**
+
+```json
+{
+  "input_text": "ここに音声入力された文字列が入ります。"
+}
+```
+
+-----
+
+### **実行指示**
+
+1.  **テキストの解析**: まず、`input_text` を読み込み、誤字、脱字、文法的な誤り、不自然な言い回しを特定します。
+2.  **方針の適用**: 変換方針に従ってテキストを修正します。
+3.  **文体の参照**: 参考文章のスタイル、トーン、語彙、句読点の使い方を参考にして、出力する文章の自然さを高めてください。
+4.  **修正の実行**: 上記の解析、方針、参照に基づき、`input_text` の元の意図を絶対に損なわないように注意しながら、句読点、助詞、接続詞などを適切に補い、自然で流暢な文章を作成します。
+5.  **出力の生成**: 修正が完了した文章を、以下の出力テンプレートの `corrected_text` の値として生成します。
+
+-----
+
+### **出力テンプレート**
+
+```json
+{
+  "corrected_text": "ここに修正・校正が完了した文章を生成します。"
+}
+```
+
+**【重要】**
+
+  * 出力は、指定された**JSON形式の出力テンプレート**を厳守してください。
+  * `corrected_text` の値以外に、いかなる説明、前置き、後書きも追加してはいけません。
+  * 文体や文のトーンを厳守してください。特に参考用のテキストに含まれるトーンは重視してください。
+"""
+
+# チャンク変換時に基本部分の直後へ追加する説明
+CHUNK_CONTEXT_PROMPT = """
+
+-----
+
+### **分割入力について**
+入力は長い文章の一部です。`preceding_context` と `following_context` には前後の原文が含まれることがあります。
+これらは文体や文脈をそろえるための参考情報であり、修正対象は `input_text` のみです。前後の文脈の内容を `corrected_text` に含めてはいけません。
+"""
+
+# 参考文章の節（参考ファイルを選び直すまで変わらないため、変換方針より前に置く）
+REFERENCE_SECTION_TEMPLATE = """
+
+-----
+
+### **参考文章（文体・スタイルの参考）**
+以下の文章のスタイル、トーン、語彙、句読点の使い方を参考にしてください。ただし、この内容を直接的に出力に反映してはいけません。
+
+<reference_text>
+{reference_text}
+</reference_text>
+
+"""
+
+# 変換方針の節（入力のたびに書き換えられやすいため最後に置く）
+POLICY_SECTION_TEMPLATE = """
+
+-----
+
+### **変換方針**
+以下の方針に厳密に従ってテキストを修正してください。方針が空欄の場合は、文脈に沿った日本語として最も自然な文章になるように修正してください。
+
+<conversion_policy>
+{conversion_policy}
+</conversion_policy>
+
+"""
+
+
+class SystemPrompt(NamedTuple):
+    """組み立て済みのシステムプロンプト
+
+    keyは本文のSHA-256。textの先頭stable_length文字は入力が変わっても変わらない
+    （参考文章全体を含む場合は基本部分と参考文章、入力に合わせて絞り込んだ参考文章の場合は基本部分と変換方針）
+    """
+    text: str
+    key: str
+    stable_length: int
+
+    def message_content(self, cache_control: bool) -> Union[str, List[Dict]]:
+        """systemメッセージのcontent（cache_controlがTrueなら変わりにくい部分の終わりにキャッシュ指定を付ける）"""
+        if not cache_control:
+            return self.text
+        parts = [{"type": "text", "text": self.text[:self.stable_length],
+                  "cache_control": {"type": "ephemeral"}}]
+        if self.stable_length < len(self.text):
+            parts.append({"type": "text", "text": self.text[self.stable_length:]})
+        return parts
+
+
+class PromptBuilder:
+    """システムプロンプトを組み立てる
+
+    基本部分 → 分割入力の説明 → 参考文章 → 変換方針 の順に、変わりにくいものから並べる。
+    参考文章を入力に合わせて絞り込んだ場合（reference_trimmed）は、入力ごとに変わる参考文章を変換方針の後に置く。
+    組み立てた結果は (変換方針, 参考文章, 分割入力か, 絞り込んだか) のハッシュをキーに覚えておき、同じ組み合わせでは再利用する
+    """
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._prompts: "OrderedDict[str, SystemPrompt]" = OrderedDict()
+
+    def build(self, conversion_policy: str, reference_text: str, chunked: bool = False,
+              reference_trimmed: bool = False) -> SystemPrompt:
+        """変換方針と参考文章からシステムプロンプトを組み立てる"""
+        material = json.dumps([conversion_policy, reference_text, chunked, reference_trimmed], ensure_ascii=False)
+        memo_key = hashlib.sha256(material.encode('utf-8')).hexdigest()
+        prompt = self._prompts.get(memo_key)
+        if prompt is not None:
+            self._prompts.move_to_end(memo_key)
+            return prompt
+
+        text = STATIC_SYSTEM_PROMPT
+        if chunked:
+            text += CHUNK_CONTEXT_PROMPT
+        reference_section = REFERENCE_SECTION_TEMPLATE.format(reference_text=reference_text) if reference_text else ""
+        policy_section = POLICY_SECTION_TEMPLATE.format(conversion_policy=conversion_policy) if conversion_policy else ""
+        if reference_trimmed:
+            # 絞り込んだ参考文章は入力ごとに変わるため、キャッシュ指定の位置より後ろに置く
+            text += policy_section
+            stable_length = len(text)
+            text += reference_section
+        else:
+            text += reference_section
+            stable_length = len(text)
+            text += policy_section
+
+        # キャッシュキー用のハッシュは組み立てた本文から求める（基本部分を変えれば別のキーになる）
+        prompt = SystemPrompt(text, hashlib.sha256(text.encode('utf-8')).hexdigest(), stable_length)
+        self._prompts[memo_key] = prompt
+        while len(self._prompts) > self.max_entries:
+            self._prompts.popitem(last=False)
+        return prompt
+
+
+_default_builder = PromptBuilder()
+
+
+def build_system_prompt(conversion_policy: str, reference_text: str) -> str:
+    """変換方針と参考文章からシステムプロンプトを組み立てる"""
+    return _default_builder.build(conversion_policy, reference_text).text
@@ -0,0 +1,95 @@
+"""
+参考用ファイルの内容のキャッシュ
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+
+class ReferenceContentCache:
+    """参考用ファイルの内容をパスと更新時刻・サイズで覚えておくキャッシュ
+
+    メモリ上のLRU（バイト数で上限）で保持し、ファイルの読み込みは専用のスレッドで行う。
+    最近使ったファイルを先読みしておけば、選択したときにすぐ内容を表示できる
+    """
+
+    def __init__(self, folder: str, memory_limit_bytes: int = 8 * 1024 * 1024):
+        self.folder = folder
+        self.memory_limit_bytes = memory_limit_bytes
+
+        # 相対パス -> ((更新時刻, サイズ), 内容)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reference-cache")
+
+    def get(self, path: str, stat: Optional[Tuple[float, int]]) -> Optional[str]:
+        """キャッシュ済みで、更新時刻・サイズがstatと一致する場合だけ内容を返す"""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != stat:
+                return None
+            self._entries.move_to_end(path)
+            return entry[1]
+
+    def request(self, path: str, stat: Optional[Tuple[float, int]] = None) -> "Future[str]":
+        """ファイルの内容を返すFuture（キャッシュにあれば完了済み、なければ別スレッドで読み込む）
+
+        statにはフォルダの監視で得た更新時刻・サイズを渡す（省略すると必ずファイルを確認する）
+        """
+        text = self.get(path, stat) if stat is not None else None
+        if text is not None:
+            future: "Future[str]" = Future()
+            future.set_result(text)
+            return future
+        return self._executor.submit(self.load, path)
+
+    def preload(self, paths: Iterable[str], files: Dict[str, Tuple[float, int]]):
+        """まだキャッシュにないファイルを別スレッドで読み込んでおく（filesはフォルダの監視で得た一覧）"""
+        for path in paths:
+            if path in files and self.get(path, files[path]) is None:
+                self._executor.submit(self._preload, path)
+
+    def load(self, path: str) -> str:
+        """ファイルを読み込んでキャッシュに入れる（変わっていなければキャッシュの内容を返す）"""
+        file_path = os.path.join(self.folder, path)
+        stat = os.stat(file_path)
+        key = (stat.st_mtime, stat.st_size)
+        text = self.get(path, key)
+        if text is not None:
+            return text
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        with self._lock:
+            self._store(path, key, text)
+        return text
+
+    def _preload(self, path: str):
+        try:
+            self.load(path)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"参考用ファイルの先読みに失敗: {path}: {e}")
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def _store(self, path: str, stat: Tuple[float, int], text: str):
+        """キャッシュに追加し、上限を超えた分を古い順に追い出す（ロック取得済みで呼ぶ）"""
+        size = self._entry_size(text)
+        if size > self.memory_limit_bytes:
+            return
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._memory_bytes -= self._entry_size(entry[1])
+        self._entries[path] = (stat, text)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_limit_bytes:
+            _, (_, old_text) = self._entries.popitem(last=False)
+            self._memory_bytes -= self._entry_size(old_text)
+
+    @staticmethod
+    def _entry_size(text: str) -> int:
+        return len(text.encode('utf-8'))
@@ -0,0 +1,228 @@
+"""
+参考フォルダ全体の断片をディスク上に保持する転置索引
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .chunking import split_into_chunks
+from .reference_watcher import scan_text_files
+from .retrieval import bm25_idf, bm25_term_score, char_bigrams, pick_passages
+
+
+def content_digest(text: str) -> str:
+    """前後の空白を除いた内容のハッシュ（GUIは参考文章の前後の空白を除いて渡すため）"""
+    return hashlib.sha256(text.strip().encode('utf-8')).hexdigest()
+
+
+class ReferenceFolderIndex:
+    """参考フォルダの.txtファイルを文単位の断片に分け、文字2-gramの転置索引をSQLiteに保存する
+
+    ファイルはフォルダからの相対パスと更新時刻・サイズで管理し、refreshでは追加・変更されたファイルだけを索引し直す。
+    内容のハッシュも保存し、参考文章がどのファイルの内容そのままかを調べられるようにする。
+    検索時は索引ファイルをメモリマップで読み、入力の2-gramの転置リストだけを引いてBM25で順位付けする
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, mtime REAL NOT NULL, size INTEGER NOT NULL,
+            digest TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS passages (
+            id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL, position INTEGER NOT NULL,
+            text TEXT NOT NULL, length INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS postings (
+            term TEXT NOT NULL, passage_id INTEGER NOT NULL, tf INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS files_digest ON files(digest);
+        CREATE INDEX IF NOT EXISTS passages_file ON passages(file_id);
+        CREATE INDEX IF NOT EXISTS postings_term ON postings(term);
+        CREATE INDEX IF NOT EXISTS postings_passage ON postings(passage_id);
+    """
+
+    # 更新時に1回の確定でまとめるファイル数（1件ずつ確定すると索引のページの書き込みが何倍にもなる）
+    FILES_PER_COMMIT = 50
+
+    # 索引ファイルをメモリマップで読む上限
+    MMAP_SIZE = 256 * 1024 * 1024
+
+    def __init__(self, index_path: str, folder: str, passage_chars: int = 200):
+        self.index_path = index_path
+        self.folder = folder
+        self.passage_chars = passage_chars
+        # 書き込み用と検索用で接続を分ける（WALでは書き込み中も確定済みの内容を検索できる）
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        # 更新は同時に1つだけ（同じファイルを二重に索引しないように）
+        self._refresh_lock = threading.Lock()
+        # 閉じる途中なら更新を打ち切る
+        self._closing = threading.Event()
+        self._connection = self._connect()
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        # 少しずつ確定するため、確定のたびの同期は省く（索引は作り直せるので電源断で失われてもよい）
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+        self._connection.executescript(self.SCHEMA)
+        self._reader = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.index_path, check_same_thread=False)
+        connection.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        return connection
+
+    def close(self):
+        """実行中の更新をファイルの区切りで打ち切らせ、終わるのを待って閉じる"""
+        self._closing.set()
+        with self._refresh_lock, self._lock, self._read_lock:
+            self._connection.close()
+            self._reader.close()
+
+    def refresh(self, found: Optional[Dict[str, Tuple[float, int]]] = None) -> Tuple[int, int]:
+        """追加・変更されたファイルを索引し直し、削除されたファイルを索引から除く
+
+        foundにフォルダの監視で得た 相対パス -> (更新時刻, サイズ) を渡すと、フォルダを調べ直さない。
+        FILES_PER_COMMIT件ごとに確定し、検索は別の接続で行うため、更新中も検索を妨げない。
+        戻り値は (索引し直したファイル数, 削除したファイル数)
+        """
+        with self._refresh_lock:
+            if self._closing.is_set():
+                return 0, 0
+            return self._refresh(found)
+
+    def _refresh(self, found: Optional[Dict[str, Tuple[float, int]]]) -> Tuple[int, int]:
+        started_at = time.perf_counter()
+        if found is None:
+            found = scan_text_files(self.folder)
+        with self._lock:
+            indexed = {path: (file_id, mtime, size) for file_id, path, mtime, size
+                       in self._connection.execute("SELECT id, path, mtime, size FROM files")}
+
+        changed = [path for path, stat in found.items()
+                   if path not in indexed or indexed[path][1:] != stat]
+        removed = [path for path in indexed if path not in found]
+
+        with self._lock, self._connection:
+            for path in removed:
+                self._delete_file(indexed[path][0])
+
+        indexed_count = 0
+        for start in range(0, len(changed), self.FILES_PER_COMMIT):
+            if self._closing.is_set():
+                break
+            # ファイルの読み込みと断片化はロックの外で行う
+            updates = []
+            for path in changed[start:start + self.FILES_PER_COMMIT]:
+                try:
+                    with open(os.path.join(self.folder, path), 'r', encoding='utf-8') as f:
+                        text = f.read()
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"参考用ファイルの索引に失敗: {path}: {e}")
+                    continue
+                passages = [chunk for chunk, _ in split_into_chunks(text, self.passage_chars) if chunk.strip()]
+                updates.append((path, content_digest(text), passages))
+            with self._lock, self._connection:
+                for path, digest, passages in updates:
+                    if path in indexed:
+                        self._delete_file(indexed[path][0])
+                    self._insert_file(path, found[path], digest, passages)
+            indexed_count += len(updates)
+
+        if indexed_count or removed:
+            print(f"=== デバッグ：参考フォルダの索引を更新（{indexed_count}件を索引, {len(removed)}件を削除, "
+                  f"{time.perf_counter() - started_at:.2f}秒） ===")
+        return indexed_count, len(removed)
+
+    def _insert_file(self, path: str, stat: Tuple[float, int], digest: str, passages: List[str]):
+        """ファイルの断片と転置リストを追加（ロックとトランザクションの中で呼ぶ）"""
+        cursor = self._connection.execute(
+            "INSERT INTO files (path, mtime, size, digest) VALUES (?, ?, ?, ?)", (path, stat[0], stat[1], digest))
+        file_id = cursor.lastrowid
+        for position, passage in enumerate(passages):
+            terms = char_bigrams(passage)
+            cursor = self._connection.execute(
+                "INSERT INTO passages (file_id, position, text, length) VALUES (?, ?, ?, ?)",
+                (file_id, position, passage, len(terms)))
+            counts: Dict[str, int] = defaultdict(int)
+            for term in terms:
+                counts[term] += 1
+            self._connection.executemany(
+                "INSERT INTO postings (term, passage_id, tf) VALUES (?, ?, ?)",
+                [(term, cursor.lastrowid, tf) for term, tf in counts.items()])
+
+    def _delete_file(self, file_id: int):
+        """ファイルの断片と転置リストを削除（ロックとトランザクションの中で呼ぶ）"""
+        self._connection.execute(
+            "DELETE FROM postings WHERE passage_id IN (SELECT id FROM passages WHERE file_id = ?)", (file_id,))
+        self._connection.execute("DELETE FROM passages WHERE file_id = ?", (file_id,))
+        self._connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def find(self, text: str) -> Optional[str]:
+        """内容がtextと同じ（前後の空白を除いて）索引済みファイルの相対パス（なければNone）"""
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT path FROM files WHERE digest = ?", (content_digest(text),)).fetchone()
+        return row[0] if row else None
+
+    def select(self, query: str, max_chars: int, top_k: int, path: Optional[str] = None) -> str:
+        """入力に近い断片を上位top_k件まで、合計max_chars文字以内で選ぶ（pathを指定するとそのファイルの中だけ）"""
+        query_terms = sorted(set(char_bigrams(query)))
+
+        file_filter = ""
+        parameters: List = []
+        if path is not None:
+            file_filter = "WHERE file_id = (SELECT id FROM files WHERE path = ?)"
+            parameters.append(path)
+
+        with self._read_lock:
+            count, average_length = self._reader.execute(
+                f"SELECT COUNT(*), AVG(length) FROM passages {file_filter}", parameters).fetchone()
+            if not count:
+                return ""
+            placeholders = ",".join("?" * len(query_terms))
+            rows = [] if not query_terms else self._reader.execute(
+                f"SELECT postings.term, postings.passage_id, postings.tf, passages.length "
+                f"FROM postings JOIN passages ON passages.id = postings.passage_id "
+                f"WHERE postings.term IN ({placeholders})"
+                + (" AND passages.file_id = (SELECT id FROM files WHERE path = ?)" if path is not None else ""),
+                query_terms + parameters).fetchall()
+
+        # BM25（ReferenceIndexと同じ式）
+        document_frequency: Dict[str, int] = defaultdict(int)
+        for term, _, _, _ in rows:
+            document_frequency[term] += 1
+        idf = {term: bm25_idf(df, count) for term, df in document_frequency.items()}
+        scores: Dict[int, float] = defaultdict(float)
+        for term, passage_id, tf, length in rows:
+            scores[passage_id] += bm25_term_score(idf[term], tf, length, average_length)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k * 4]
+        passages: Dict[int, Tuple[int, int, str]] = {}
+        if ranked:
+            with self._read_lock:
+                placeholders = ",".join("?" * len(ranked))
+                passages = {passage_id: (file_id, position, text) for passage_id, file_id, position, text
+                            in self._reader.execute(
+                                f"SELECT id, file_id, position, text FROM passages WHERE id IN ({placeholders})",
+                                ranked)}
+            # 2回の読み取りの間に索引し直された断片は除く
+            ranked = [passage_id for passage_id in ranked if passage_id in passages]
+        if not ranked:
+            # 入力と共通する断片がなければ、ReferenceIndexと同じく先頭から順に断片を使う
+            with self._read_lock:
+                passages = {passage_id: (file_id, position, text) for passage_id, file_id, position, text
+                            in self._reader.execute(
+                                f"SELECT id, file_id, position, text FROM passages {file_filter} "
+                                f"ORDER BY file_id, position LIMIT ?", parameters + [top_k * 4])}
+            ranked = list(passages)
+            if not ranked:
+                return ""
+
+        selected = pick_passages(ranked, {passage_id: len(passages[passage_id][2]) for passage_id in ranked},
+                                 max_chars, top_k)
+        if not selected:
+            return passages[ranked[0]][2][:max_chars]
+        # ファイル内の元の順序で結合する
+        selected.sort(key=lambda passage_id: passages[passage_id][:2])
+        return "\n".join(passages[passage_id][2] for passage_id in selected)
@@ -0,0 +1,196 @@
+"""
+参考フォルダのファイル一覧を別スレッドで最新に保つ監視
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def scan_text_files(folder: str, directories: Optional[List[str]] = None) -> Dict[str, Tuple[float, int]]:
+    """フォルダ（サブフォルダを含む）の.txtファイルの 相対パス -> (更新時刻, サイズ)
+
+    directoriesを渡すと、見つかったフォルダのパスを追加する
+    """
+    found = {}
+    for root, _, names in os.walk(folder):
+        if directories is not None:
+            directories.append(root)
+        for name in names:
+            if not name.endswith(".txt"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            relative = os.path.relpath(path, folder).replace(os.sep, "/")
+            found[relative] = (stat.st_mtime, stat.st_size)
+    return found
+
+
+class _Inotify:
+    """ctypes経由のinotify（Linuxのみ。使えなければ生成時にOSError）"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_IGNORED = 0x00008000
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                  | IN_DELETE_SELF | IN_MOVE_SELF)
+
+    # struct inotify_event の固定部分（wd, mask, cookie, len）
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is not available on this platform")
+        # ctypesは監視を始めるときだけ読み込む（索引だけを使う場合に読み込まないように）
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # 監視中のフォルダ -> 監視記述子
+        self._watches: Dict[str, int] = {}
+
+    def watch(self, directories: List[str]):
+        """まだ監視していないフォルダを監視に加え、なくなったフォルダの監視をやめる"""
+        current = set(directories)
+        for path in list(self._watches):
+            if path not in current:
+                self._rm_watch(self.fd, self._watches.pop(path))
+        for path in current:
+            if path not in self._watches:
+                wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+                if wd >= 0:
+                    self._watches[path] = wd
+
+    def wait(self, timeout: float) -> bool:
+        """timeout秒までイベントを待ち、届いたイベントを読み捨てる（イベントがあればTrue）"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size + length
+                if mask & self.IN_IGNORED:
+                    # 削除されたフォルダの監視記述子は無効になる
+                    for path, watched in list(self._watches.items()):
+                        if watched == wd:
+                            del self._watches[path]
+                changed = True
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ReferenceWatcher:
+    """参考フォルダ（サブフォルダを含む）の.txtファイル一覧を別スレッドで最新に保つ
+
+    Linuxではinotifyで変更を待ち、それ以外では更新時刻をpoll_seconds秒ごとに調べる。
+    一覧の取得（snapshot）はロックを取って参照を返すだけなので、GUIスレッドから何度呼んでもよい
+    """
+
+    # 変更の通知が続けて届く間は、落ち着くまで待ってから調べ直す
+    SETTLE_SECONDS = 0.2
+
+    def __init__(self, folder: str, poll_seconds: float = 2.0,
+                 on_change: Optional[Callable[[Dict[str, Tuple[float, int]]], None]] = None):
+        self.folder = folder
+        self.poll_seconds = poll_seconds
+        self.on_change = on_change
+        # 一覧が変わるたびに増える番号（GUIは前回の番号と比べて表示を更新する）
+        self.generation = 0
+        self._files: Dict[str, Tuple[float, int]] = {}
+        self._listing: Tuple[str, ...] = ()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._rescan_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="reference-watcher", daemon=True)
+        self._thread.start()
+
+    def snapshot(self) -> Tuple[str, ...]:
+        """最新の一覧（相対パスの並び）"""
+        with self._lock:
+            return self._listing
+
+    def files(self) -> Dict[str, Tuple[float, int]]:
+        """最新の 相対パス -> (更新時刻, サイズ)（呼び出し側は変更しないこと）"""
+        with self._lock:
+            return self._files
+
+    def rescan(self):
+        """すぐに調べ直すよう依頼する（すぐに戻る）"""
+        self._rescan_event.set()
+
+    def close(self):
+        self._stop_event.set()
+        self._rescan_event.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self):
+        """監視スレッドの本体"""
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+        except OSError as e:
+            print(f"参考フォルダを作成できませんでした: {e}")
+
+        inotify = None
+        try:
+            inotify = _Inotify()
+        except (OSError, AttributeError) as e:
+            print(f"=== デバッグ：inotifyを使えないため、参考フォルダを{self.poll_seconds}秒ごとに確認します（{e}） ===")
+
+        try:
+            while not self._stop_event.is_set():
+                directories: List[str] = []
+                self._update(scan_text_files(self.folder, directories))
+                if inotify is not None and directories:
+                    inotify.watch(directories)
+                    # 手動の再確認の依頼に応えられるよう、短い間隔で待つ
+                    while not self._stop_event.is_set() and not self._rescan_event.is_set():
+                        if inotify.wait(0.5):
+                            while inotify.wait(self.SETTLE_SECONDS):
+                                pass
+                            break
+                else:
+                    # フォルダがまだない間もここで待つ
+                    self._rescan_event.wait(self.poll_seconds)
+                self._rescan_event.clear()
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _update(self, found: Dict[str, Tuple[float, int]]):
+        """調べた結果が前回と違えば一覧を差し替えて通知する"""
+        with self._lock:
+            if found == self._files:
+                return
+            self._files = found
+            self._listing = tuple(sorted(found))
+            self.generation += 1
+        if self.on_change is not None:
+            try:
+                self.on_change(found)
+            except Exception as e:
+                print(f"参考フォルダの変更の通知に失敗: {e}")
@@ -0,0 +1,125 @@
+"""
+参考文章から入力に近い部分だけを選び出す検索
+"""
+
+import hashlib
+import math
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List
+
+from .chunking import split_into_chunks
+
+
+def char_bigrams(text: str) -> List[str]:
+    """空白を除いた文字の2-gram（日本語は単語の区切りがないため文字単位で比べる）"""
+    chars = [c for c in text if not c.isspace()]
+    return [chars[i] + chars[i + 1] for i in range(len(chars) - 1)]
+
+
+# BM25のパラメータ
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def bm25_idf(document_frequency: int, document_count: int) -> float:
+    """BM25の逆文書頻度"""
+    return math.log(1 + (document_count - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+def bm25_term_score(idf: float, tf: int, length: int, average_length: float) -> float:
+    """1つの語が断片の点数に加える値"""
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or 1.0))
+    return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+
+def pick_passages(ranked: List[int], lengths: Dict[int, int], max_chars: int, top_k: int) -> List[int]:
+    """順位の高い断片からtop_k件まで、合計max_chars文字以内で選ぶ"""
+    selected = []
+    total = 0
+    for index in ranked:
+        if len(selected) >= top_k:
+            break
+        if total + lengths[index] > max_chars:
+            continue
+        selected.append(index)
+        total += lengths[index]
+    return selected
+
+
+class ReferenceIndex:
+    """参考文章を文単位の断片に分け、文字2-gramのBM25で入力との近さを求める索引"""
+
+    def __init__(self, passages: List[str]):
+        self.passages = passages
+        self._term_counts = [Counter(char_bigrams(passage)) for passage in passages]
+        self._lengths = [sum(counts.values()) for counts in self._term_counts]
+        self._average_length = (sum(self._lengths) / len(passages)) if passages else 0.0
+        document_frequency: Counter = Counter()
+        for counts in self._term_counts:
+            document_frequency.update(counts.keys())
+        self._idf = {term: bm25_idf(df, len(passages)) for term, df in document_frequency.items()}
+
+    @classmethod
+    def from_text(cls, text: str, passage_chars: int) -> "ReferenceIndex":
+        """参考文章を文・段落の区切りでpassage_chars程度の断片に分けて索引を作る"""
+        return cls([chunk for chunk, _ in split_into_chunks(text, passage_chars) if chunk.strip()])
+
+    def scores(self, query: str) -> List[float]:
+        """各断片の入力との近さ（BM25）"""
+        query_terms = set(char_bigrams(query))
+        results = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = counts.get(term)
+                if tf:
+                    score += bm25_term_score(self._idf[term], tf, length, self._average_length)
+            results.append(score)
+        return results
+
+    def select(self, query: str, max_chars: int, top_k: int) -> str:
+        """入力に近い断片を上位top_k件まで、合計max_chars文字以内で選び、元の順序で結合する"""
+        scores = self.scores(query)
+        ranked = sorted(range(len(self.passages)), key=lambda i: scores[i], reverse=True)
+        selected = pick_passages(ranked, {i: len(passage) for i, passage in enumerate(self.passages)},
+                                 max_chars, top_k)
+        if not selected and ranked:
+            # 1つの断片だけで上限を超える場合は、最も近い断片を上限で切って使う
+            return self.passages[ranked[0]][:max_chars]
+        return "\n".join(self.passages[index] for index in sorted(selected))
+
+
+class ReferenceRetriever:
+    """参考文章ごとの索引を覚えておき、入力に近い部分だけを返す"""
+
+    def __init__(self, passage_chars: int = 200, max_chars: int = 1500, top_k: int = 5,
+                 max_indexes: int = 8):
+        self.passage_chars = passage_chars
+        self.max_chars = max_chars
+        self.top_k = top_k
+        self.max_indexes = max_indexes
+        self._indexes: "OrderedDict[str, ReferenceIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def index_for(self, reference_text: str) -> ReferenceIndex:
+        """参考文章の索引を返す（同じ内容なら作り直さない）"""
+        key = hashlib.sha256(reference_text.encode('utf-8')).hexdigest()
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        # 索引の作成はロックの外で行う（複数のスレッドから呼ばれる）
+        index = ReferenceIndex.from_text(reference_text, self.passage_chars)
+        with self._lock:
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_indexes:
+                self._indexes.popitem(last=False)
+        return index
+
+    def retrieve(self, reference_text: str, query: str) -> str:
+        """参考文章がmax_charsを超える場合だけ、入力に近い部分に絞り込む"""
+        if len(reference_text) <= self.max_chars:
+            return reference_text
+        return self.index_for(reference_text).select(query, self.max_chars, self.top_k)
@@ -0,0 +1,160 @@
+"""
+再試行ポリシーとサーキットブレーカー
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional
+
+import requests
+
+from .errors import APIError, CircuitOpenError
+
+
+class RetryStats:
+    """1回の変換における再試行の記録"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.retries = 0
+        self.retry_seconds = 0.0
+
+    def __str__(self) -> str:
+        return f"再試行 {self.retries}回 ({self.retry_seconds:.1f}秒)"
+
+
+class CircuitBreaker:
+    """上流の障害が続いている間、呼び出しを行わずに即座に失敗させる"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """呼び出し前の確認（開いている間はCircuitOpenErrorを送出）
+
+        半開状態で試行を許可した呼び出しならTrueを返す。この呼び出しは結果をrecord_success/
+        record_failureで記録するか、結果を判定できないまま終わったらabort_trialを呼ぶこと
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.reset_seconds - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(
+                        f"APIが応答しない状態が続いているため、呼び出しを停止しています（あと{int(remaining) + 1}秒）",
+                        retry_after=remaining
+                    )
+                # 待ち時間が過ぎたら1回だけ試行を許可
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = True
+                return True
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    # 試行の結果が出るまでは、ほかの呼び出しを通さない
+                    raise CircuitOpenError("APIの復旧を確認中のため、呼び出しを停止しています")
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def abort_trial(self):
+        """試行が成功とも失敗とも判定できずに終わった（取り消し・再試行しないエラー）"""
+        with self._lock:
+            # 半開状態のまま、次の呼び出しに試行を譲る
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+
+class RetryPolicy:
+    """指数バックオフ（ジッター付き）による再試行
+
+    再試行可能なエラーのみ再試行し、Retry-Afterを尊重し、全体の期限を超えない
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 8.0, deadline: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """エラーを再試行可能かどうかに分類"""
+        if isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, APIError):
+            return error.retryable
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def backoff(self, retry_index: int) -> float:
+        """retry_index回目の再試行までの待ち時間（フルジッター）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry_index)))
+
+    async def run(self, func: Callable[[], Awaitable[str]], stats: RetryStats,
+                  breaker: Optional[CircuitBreaker] = None,
+                  on_retry: Optional[Callable[[int, float, Exception], None]] = None) -> str:
+        """funcを再試行ポリシーに従って実行（待機中にタスクが取り消されたら即座に中断）"""
+        start = time.monotonic()
+        while True:
+            trial = breaker.before_call() if breaker else False
+
+            stats.attempts += 1
+            recorded = False
+            try:
+                result = await func()
+            except Exception as e:
+                retryable = self.is_retryable(e)
+                if breaker and retryable:
+                    breaker.record_failure()
+                    recorded = True
+                if not retryable or stats.attempts >= self.max_attempts:
+                    raise
+
+                delay = self.backoff(stats.retries)
+                if isinstance(e, APIError) and e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                if time.monotonic() - start + delay > self.deadline:
+                    raise
+
+                if on_retry:
+                    on_retry(stats.attempts, delay, e)
+                print(f"再試行します（{stats.attempts}回目の失敗: {e}、{delay:.1f}秒後）")
+                await asyncio.sleep(delay)
+                stats.retries += 1
+                # 失敗と待機に費やした時間（最後の試行の開始まで）
+                stats.retry_seconds = time.monotonic() - start
+                continue
+            else:
+                if breaker:
+                    breaker.record_success()
+                    recorded = True
+                return result
+            finally:
+                # 取り消し（CancelledError）や再試行しないエラーで終わった試行が半開状態を塞がないようにする
+                if trial and not recorded:
+                    breaker.abort_trial()
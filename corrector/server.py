@@ -0,0 +1,276 @@
+"""
+ローカルHTTPで変換を提供するサーバーモード
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+import requests
+
+from .engine import ConversionEngine, ConversionJob, EngineEvent
+from .errors import APIError, ResponseParseError
+
+
+class ServerMetrics:
+    """待ち行列の長さ・処理件数・応答時間の記録"""
+
+    # 応答時間の百分位数を求めるために残す件数
+    LATENCY_WINDOW = 1000
+
+    def __init__(self):
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._latencies: "deque[float]" = deque(maxlen=self.LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, succeeded: bool):
+        with self._lock:
+            self._latencies.append(latency)
+            if succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def snapshot(self) -> Dict:
+        """現在の状態をJSONにできる形で返す"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            result = {
+                "queue_depth": self.waiting,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+            }
+
+        def percentile(p: float) -> Optional[float]:
+            if not latencies:
+                return None
+            index = min(len(latencies) - 1, int(len(latencies) * p / 100))
+            return round(latencies[index] * 1000, 1)
+
+        result["latency_ms"] = {"p50": percentile(50), "p90": percentile(90), "p99": percentile(99)}
+        return result
+
+
+class CorrectionServer(ThreadingHTTPServer):
+    """1つの変換エンジン（接続プール・キャッシュ）をすべてのクライアントで共有するHTTPサーバー
+
+    同時に変換する数をmax_concurrencyに制限し、待ちがmax_queueを超えた要求は503で断る
+    """
+
+    daemon_threads = True
+
+    def __init__(self, settings: Dict):
+        super().__init__((settings["server_host"], settings["server_port"]), CorrectionRequestHandler)
+        self.settings = settings
+        self.metrics = ServerMetrics()
+        # 同時に変換する数だけ接続を用意する
+        engine_settings = dict(settings, http_pool_size=max(settings["http_pool_size"],
+                                                            settings["server_max_concurrency"]))
+        self.engine = ConversionEngine(engine_settings, events=queue.Queue())
+        self._slots = threading.Semaphore(settings["server_max_concurrency"])
+        self._metrics_lock = threading.Lock()
+
+        # ストリーミング中のジョブへ途中経過を振り分ける
+        self._subscribers: Dict[ConversionJob, "queue.Queue[EngineEvent]"] = {}
+        self._subscribers_lock = threading.Lock()
+        self._dispatcher = threading.Thread(target=self._dispatch_events, name="server-events", daemon=True)
+        self._dispatcher.start()
+
+    def _dispatch_events(self):
+        """エンジンのイベントを、購読しているリクエストのキューに渡す"""
+        while True:
+            event = self.engine.events.get()
+            if event is None:
+                return
+            with self._subscribers_lock:
+                subscriber = self._subscribers.get(event.job)
+            if subscriber is not None:
+                subscriber.put(event)
+
+    def subscribe(self, job: ConversionJob) -> "queue.Queue[EngineEvent]":
+        events: "queue.Queue[EngineEvent]" = queue.Queue()
+        with self._subscribers_lock:
+            self._subscribers[job] = events
+        return events
+
+    def unsubscribe(self, job: ConversionJob):
+        with self._subscribers_lock:
+            self._subscribers.pop(job, None)
+
+    def acquire_slot(self) -> bool:
+        """変換の実行枠を待って確保する（待ち行列が一杯ならFalse）"""
+        with self._metrics_lock:
+            if self.metrics.waiting >= self.settings["server_max_queue"]:
+                self.metrics.rejected += 1
+                return False
+            self.metrics.waiting += 1
+        self._slots.acquire()
+        with self._metrics_lock:
+            self.metrics.waiting -= 1
+            self.metrics.in_flight += 1
+        return True
+
+    def release_slot(self):
+        with self._metrics_lock:
+            self.metrics.in_flight -= 1
+        self._slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.engine.events.put(None)
+        self.engine.close()
+
+
+class CorrectionRequestHandler(BaseHTTPRequestHandler):
+    """変換サーバーのエンドポイント
+
+    POST /correct         {"text", "policy"?, "reference"?} → {"corrected_text", "from_cache", "elapsed"}
+    POST /correct/stream  同じ入力で、途中経過を1行1つのJSON（{"partial": ...}）で返し、最後に結果を返す
+    GET  /health          待ち行列の長さ・処理件数・応答時間の百分位数・共有により節約した呼び出し数・応答の解析経路
+    """
+
+    server: CorrectionServer
+
+    def log_message(self, format, *args):
+        print(f"[server] {self.address_string()} {format % args}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, dict(self.server.metrics.snapshot(), status="ok",
+                                      coalesced_requests=self.server.engine.coalesced_requests,
+                                      parse_paths=self.server.engine.parse_stats.counts))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path not in ("/correct", "/correct/stream"):
+            self._send_json(404, {"error": "not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            text = request["text"]
+            if not isinstance(text, str):
+                raise ValueError("text must be a string")
+            if not text.strip():
+                raise ValueError("text must not be empty")
+            # 方針・参考文章を省略した場合はsettings.jsonのものを使う
+            settings = self.server.settings
+            policy = self._optional_string(request, "policy", settings.get("conversion_policy", ""))
+            reference = self._optional_string(request, "reference", settings.get("reference_text", ""))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"invalid request: {e}"})
+            return
+
+        job = ConversionJob(text.strip(), conversion_policy=policy, reference_text=reference)
+
+        if not self.server.acquire_slot():
+            self._send_json(503, {"error": "too many requests"})
+            return
+        started_at = time.monotonic()
+        try:
+            if self.path == "/correct/stream":
+                self._correct_streaming(job, started_at)
+            else:
+                self._correct(job, started_at)
+        finally:
+            self.server.release_slot()
+
+    @staticmethod
+    def _optional_string(request: Dict, key: str, default: str) -> str:
+        """省略できる文字列の項目（省略またはnullならdefault、文字列でなければValueError）"""
+        value = request.get(key)
+        if value is None:
+            return default
+        if not isinstance(value, str):
+            raise ValueError(f"{key} must be a string")
+        return value
+
+    def _correct(self, job: ConversionJob, started_at: float):
+        try:
+            corrected_text = self.server.engine.correct_sync(job)
+        except Exception as e:
+            self.server.metrics.record(time.monotonic() - started_at, succeeded=False)
+            self._send_json(self._error_status(e), {"error": str(e)})
+            return
+        elapsed = time.monotonic() - started_at
+        self.server.metrics.record(elapsed, succeeded=True)
+        self._send_json(200, {"corrected_text": corrected_text, "from_cache": job.from_cache,
+                              "elapsed": round(elapsed, 3)})
+
+    def _correct_streaming(self, job: ConversionJob, started_at: float):
+        events = self.server.subscribe(job)
+        try:
+            future = self.server.engine.submit(job)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            while not future.done() or not events.empty():
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if event.kind == ConversionEngine.PARTIAL:
+                    self._write_line({"partial": event.payload})
+
+            try:
+                corrected_text = future.result()
+            except Exception as e:
+                self.server.metrics.record(time.monotonic() - started_at, succeeded=False)
+                self._write_line({"error": str(e), "status": self._error_status(e)})
+                return
+            elapsed = time.monotonic() - started_at
+            self.server.metrics.record(elapsed, succeeded=True)
+            self._write_line({"corrected_text": corrected_text, "from_cache": job.from_cache,
+                              "elapsed": round(elapsed, 3)})
+        except OSError:
+            # クライアントが切断したら変換も中止する
+            job.cancel()
+        finally:
+            self.server.unsubscribe(job)
+
+    @staticmethod
+    def _error_status(error: Exception) -> int:
+        """例外に対応するHTTPステータス（API・応答の失敗は502）"""
+        if isinstance(error, (APIError, requests.RequestException, ResponseParseError)):
+            return 502
+        return 500
+
+    def _write_line(self, record: Dict):
+        self.wfile.write((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+        self.wfile.flush()
+
+    def _send_json(self, status: int, record: Dict):
+        body = json.dumps(record, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def run_server(settings: Dict):
+    """変換サーバーを起動し、Ctrl+Cで止めるまで要求を処理する"""
+    server = CorrectionServer(settings)
+    print(f"変換サーバーを起動しました: http://{settings['server_host']}:{settings['server_port']}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
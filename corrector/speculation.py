@@ -0,0 +1,38 @@
+"""
+入力中の先行変換（投機的変換）の制限
+"""
+
+import time
+from collections import deque
+
+
+class SpeculationBudget:
+    """先行変換の回数と文字数を直近の時間枠で制限する
+
+    入力が止まるたびに変換を先行させると、API呼び出しが際限なく増えるため
+    1分あたりの回数と1時間あたりの送信文字数に上限を設ける
+    """
+
+    def __init__(self, max_requests_per_minute: int = 4, max_chars_per_hour: int = 20000):
+        self.max_requests_per_minute = max_requests_per_minute
+        self.max_chars_per_hour = max_chars_per_hour
+        # (時刻, 文字数) の履歴
+        self._history: "deque[tuple]" = deque()
+        self._chars_in_hour = 0
+
+    def try_acquire(self, chars: int) -> bool:
+        """上限内であれば枠を消費してTrueを返す"""
+        now = time.monotonic()
+        while self._history and now - self._history[0][0] > 60 * 60:
+            _, old_chars = self._history.popleft()
+            self._chars_in_hour -= old_chars
+
+        requests_in_minute = sum(1 for timestamp, _ in self._history if now - timestamp <= 60)
+        if requests_in_minute >= self.max_requests_per_minute:
+            return False
+        if self._chars_in_hour + chars > self.max_chars_per_hour:
+            return False
+
+        self._history.append((now, chars))
+        self._chars_in_hour += chars
+        return True
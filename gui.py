@@ -0,0 +1,908 @@
+"""
+VOICE_CORRECTOR - 音声入力テキスト修正ツールのGUI
+
+音声入力された文字列を文法的に正しい文章に変換するGUIアプリケーション
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox, scrolledtext
+import json
+import os
+import pyperclip
+import queue
+import winsound
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+import ctypes
+import platform
+
+from corrector import (DEFAULT_OPTIONS, ConversionEngine, ConversionJob, ReferenceContentCache, ReferenceWatcher,
+                       SpeculationBudget)
+
+
+class VoiceCorrector:
+    # 変換エンジンのイベントキューを確認する間隔
+    ENGINE_POLL_INTERVAL_MS = 30
+    # 参考用ファイルリストの変更を画面に反映する間隔
+    REFERENCE_POLL_INTERVAL_MS = 500
+    # 先読みの対象として覚えておく、最近選択した参考用ファイルの数
+    RECENT_REFERENCE_FILES = 5
+
+    def __init__(self):
+        # DPI対応の設定
+        self.setup_dpi_awareness()
+        
+        self.root = tk.Tk()
+        self.root.title("VOICE_CORRECTOR")
+        
+        # DPIスケーリングファクターを取得
+        self.scale_factor = self.get_scale_factor()
+        
+        # フォントサイズの調整
+        self.setup_scaled_fonts()
+        
+        # 設定ファイルのパス
+        self.config_file = "settings.json"
+        self.reference_folder = "reference"
+        
+        # 設定の初期値
+        self.settings = {
+            "conversion_policy": "",
+            "reference_text": "",
+            "selected_reference_file": "",
+            "window_width": 800,
+            "window_height": 600,
+            "window_x": None,
+            "window_y": None,
+            "show_policy_section": True,
+            "show_reference_section": True,
+            # 入力が止まったら変換を先行させる（オプトイン）
+            "speculative_conversion": False,
+            "speculative_idle_ms": 1500,
+            "speculative_min_chars": 20,
+            "speculative_max_per_minute": 4,
+            "speculative_max_chars_per_hour": 20000,
+            # 参考フォルダの変更を確認する間隔（inotifyを使えない環境のみ）
+            "reference_poll_seconds": 2.0,
+            # 参考用ファイルの内容を覚えておく量と、先読みする最近のファイル
+            "reference_cache_memory_bytes": 8 * 1024 * 1024,
+            "recent_reference_files": [],
+            # 変換エンジンの設定（既定値はcorrectorパッケージで定義）
+            **DEFAULT_OPTIONS,
+            # GUIでは参考フォルダを監視して索引を更新するため、参考フォルダの索引を使う
+            "reference_index_enabled": True
+        }
+        
+        # 参考用ファイルリスト
+        self.reference_files = []
+        
+        # GUI構成要素の初期化
+        self.setup_gui()
+        
+        # 設定の読み込み
+        self.load_settings()
+        
+        # ウィンドウサイズとポジションの復元
+        self.restore_window_geometry()
+        
+        # 変換エンジン（結果はイベントキュー経由で受け取る）
+        self.engine = ConversionEngine(self.settings, events=queue.Queue())
+        
+        # 参考用ファイルリストは別スレッドで監視し、変わったときだけ画面に反映する
+        self.reference_folder = self.settings["reference_folder"]
+        self.reference_watcher = ReferenceWatcher(self.reference_folder,
+                                                  poll_seconds=self.settings["reference_poll_seconds"],
+                                                  on_change=self.engine.refresh_reference_index)
+        self._reference_generation = -1
+        
+        # 参考用ファイルの内容（選択時はキャッシュか別スレッドの読み込みから受け取る）
+        self.reference_cache = ReferenceContentCache(self.reference_folder,
+                                                     memory_limit_bytes=self.settings["reference_cache_memory_bytes"])
+        self._pending_reference: Optional[Tuple[str, Future]] = None
+        
+        # 実行中の変換ジョブ（これ以外のジョブの結果は画面に反映しない）
+        self.current_job: Optional[ConversionJob] = None
+        
+        # 先行変換の状態（ジョブ、完了済みの結果、入力停止待ちのタイマー）
+        self.speculative_job: Optional[ConversionJob] = None
+        self.speculative_result: Optional[str] = None
+        self._speculation_timer = None
+        self.speculation_budget = SpeculationBudget(
+            max_requests_per_minute=self.settings["speculative_max_per_minute"],
+            max_chars_per_hour=self.settings["speculative_max_chars_per_hour"]
+        )
+        
+        # エンジンからのイベントを定期的に受け取る
+        self.root.after(self.ENGINE_POLL_INTERVAL_MS, self._poll_engine_events)
+        self.root.after(self.REFERENCE_POLL_INTERVAL_MS, self._poll_reference_files)
+        
+    def setup_dpi_awareness(self):
+        """DPI認識を設定"""
+        try:
+            if platform.system() == "Windows":
+                # Windows 8.1以降でDPI認識を有効化
+                ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        except Exception:
+            # 古いWindowsバージョンでは何もしない
+            pass
+    
+    def get_scale_factor(self) -> float:
+        """現在のDPIスケーリングファクターを取得"""
+        try:
+            if platform.system() == "Windows":
+                # Windows DPIスケールを取得
+                import tkinter as tk
+                root = tk.Tk()
+                root.withdraw()  # ウィンドウを表示しない
+                dpi = root.winfo_fpixels('1i')
+                root.destroy()
+                # 標準DPI(96)との比率を計算
+                scale_factor = dpi / 96.0
+                # スケールファクターを1.0〜2.0の範囲に制限
+                return max(1.0, min(2.0, scale_factor))
+            else:
+                return 1.0
+        except Exception:
+            return 1.0
+    
+    def setup_scaled_fonts(self):
+        """スケーリングに対応したフォントを設定"""
+        # 基本フォントサイズ
+        base_font_size = 9
+        scaled_font_size = int(base_font_size * self.scale_factor)
+        
+        # デフォルトフォントを設定
+        default_font = ("Yu Gothic UI", scaled_font_size)
+        self.root.option_add("*Font", default_font)
+        
+        # ttk.Styleでより詳細な設定
+        style = ttk.Style()
+        style.configure(".", font=default_font)
+        style.configure("TLabel", font=default_font)
+        style.configure("TButton", font=default_font)
+        style.configure("TCombobox", font=default_font)
+        
+    def scale_size(self, size: int) -> int:
+        """サイズをスケーリングファクターに基づいて調整"""
+        return int(size * self.scale_factor)
+    
+    def restore_window_geometry(self):
+        """保存されたウィンドウサイズとポジションを復元"""
+        try:
+            # 保存された設定から値を取得
+            saved_width = self.settings.get("window_width", 800)
+            saved_height = self.settings.get("window_height", 600)
+            saved_x = self.settings.get("window_x")
+            saved_y = self.settings.get("window_y")
+            
+            # DPIスケーリングを適用
+            scaled_width = int(saved_width * self.scale_factor)
+            scaled_height = int(saved_height * self.scale_factor)
+            
+            # ウィンドウサイズを設定
+            if saved_x is not None and saved_y is not None:
+                # ポジションも保存されている場合
+                scaled_x = int(saved_x * self.scale_factor)
+                scaled_y = int(saved_y * self.scale_factor)
+                
+                # 画面外に出ないように調整
+                screen_width = self.root.winfo_screenwidth()
+                screen_height = self.root.winfo_screenheight()
+                
+                # 最小限の表示領域を確保
+                if scaled_x < 0:
+                    scaled_x = 0
+                if scaled_y < 0:
+                    scaled_y = 0
+                if scaled_x + scaled_width > screen_width:
+                    scaled_x = screen_width - scaled_width
+                if scaled_y + scaled_height > screen_height:
+                    scaled_y = screen_height - scaled_height
+                
+                self.root.geometry(f"{scaled_width}x{scaled_height}+{scaled_x}+{scaled_y}")
+            else:
+                # ポジションが保存されていない場合はサイズのみ設定
+                self.root.geometry(f"{scaled_width}x{scaled_height}")
+                
+        except Exception as e:
+            # エラーが発生した場合はデフォルトサイズ
+            print(f"ウィンドウサイズの復元に失敗: {e}")
+            default_width = int(800 * self.scale_factor)
+            default_height = int(600 * self.scale_factor)
+            self.root.geometry(f"{default_width}x{default_height}")
+        
+    def setup_gui(self):
+        """GUI要素のセットアップ"""
+        # メインフレーム
+        padding = self.scale_size(10)
+        main_frame = ttk.Frame(self.root, padding=str(padding))
+        main_frame.grid(row=0, column=0, sticky="nsew")
+        
+        # グリッドの重みを設定
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        # 入力ボックス
+        ttk.Label(main_frame, text="入力ボックス (改行3連続で自動変換):").grid(row=0, column=0, sticky=tk.W, pady=(0, self.scale_size(5)))
+        input_height = self.scale_size(6)
+        input_width = self.scale_size(70)
+        self.input_text = scrolledtext.ScrolledText(main_frame, height=input_height, width=input_width)
+        self.input_text.grid(row=1, column=0, columnspan=2, sticky="nsew", pady=(0, self.scale_size(10)))
+        
+        # 入力ボックスのキーイベントをバインド（改行3連続での自動変換）
+        self.input_text.bind('<KeyRelease>', self.on_input_key_release)
+        
+        # 右クリックメニューを明示的に有効化
+        self.setup_text_context_menu(self.input_text)
+        
+        # 変換の方針セクション（折りたたみ可能）
+        policy_frame = ttk.Frame(main_frame)
+        policy_frame.grid(row=2, column=0, columnspan=2, sticky="ew", pady=(0, self.scale_size(10)))
+        policy_frame.columnconfigure(0, weight=1)
+        
+        # 方針セクションのヘッダー（クリックで展開/折りたたみ）
+        self.policy_header_frame = ttk.Frame(policy_frame)
+        self.policy_header_frame.grid(row=0, column=0, sticky="ew")
+        self.policy_header_frame.columnconfigure(0, weight=1)
+        
+        self.policy_toggle_btn = ttk.Button(self.policy_header_frame, text="▼ 変換の方針", 
+                                          command=self.toggle_policy_section)
+        self.policy_toggle_btn.grid(row=0, column=0, sticky=tk.W)
+        
+        # 方針セクションのコンテンツ
+        self.policy_content_frame = ttk.Frame(policy_frame)
+        self.policy_content_frame.grid(row=1, column=0, sticky="ew", pady=(self.scale_size(5), 0))
+        self.policy_content_frame.columnconfigure(0, weight=1)
+        
+        policy_height = self.scale_size(3)
+        self.policy_text = scrolledtext.ScrolledText(self.policy_content_frame, height=policy_height, width=input_width)
+        self.policy_text.grid(row=0, column=0, sticky="ew")
+        
+        # 右クリックメニューを設定
+        self.setup_text_context_menu(self.policy_text)
+        
+        # 参考用セクション（折りたたみ可能）
+        reference_main_frame = ttk.Frame(main_frame)
+        reference_main_frame.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(0, self.scale_size(10)))
+        reference_main_frame.columnconfigure(0, weight=1)
+        
+        # 参考用セクションのヘッダー
+        self.reference_header_frame = ttk.Frame(reference_main_frame)
+        self.reference_header_frame.grid(row=0, column=0, sticky="ew")
+        self.reference_header_frame.columnconfigure(0, weight=1)
+        
+        self.reference_toggle_btn = ttk.Button(self.reference_header_frame, text="▼ 参考用ファイル", 
+                                             command=self.toggle_reference_section)
+        self.reference_toggle_btn.grid(row=0, column=0, sticky=tk.W)
+        
+        # 参考用セクションのコンテンツ
+        self.reference_content_frame = ttk.Frame(reference_main_frame)
+        self.reference_content_frame.grid(row=1, column=0, sticky="ew", pady=(self.scale_size(5), 0))
+        self.reference_content_frame.columnconfigure(0, weight=1)
+        
+        reference_frame = ttk.Frame(self.reference_content_frame)
+        reference_frame.grid(row=0, column=0, sticky="ew", pady=(0, self.scale_size(5)))
+        reference_frame.columnconfigure(1, weight=1)
+        
+        combo_width = self.scale_size(30)
+        self.reference_selector = ttk.Combobox(reference_frame, width=combo_width, state="readonly")
+        self.reference_selector.grid(row=0, column=0, padx=(0, self.scale_size(10)))
+        self.reference_selector.bind("<<ComboboxSelected>>", self.on_reference_selected)
+        
+        refresh_btn = ttk.Button(reference_frame, text="更新", command=self.rescan_reference_files)
+        refresh_btn.grid(row=0, column=1, sticky=tk.W)
+        
+        reference_height = self.scale_size(4)
+        self.reference_text = scrolledtext.ScrolledText(self.reference_content_frame, height=reference_height, width=input_width)
+        self.reference_text.grid(row=1, column=0, sticky="ew")
+        
+        # 右クリックメニューを設定
+        self.setup_text_context_menu(self.reference_text)
+        
+        # ボタンフレーム（新レイアウト）
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=self.scale_size(10))
+        button_frame.columnconfigure(0, weight=1)
+        button_frame.columnconfigure(1, weight=1)
+        
+        # 変換ボタン（横幅いっぱい、縦の長さ2倍）
+        button_height = self.scale_size(60)  # 通常の2倍の高さ
+        self.convert_btn = ttk.Button(button_frame, text="変換", command=self.convert_text)
+        self.convert_btn.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, self.scale_size(5)))
+        self.convert_btn.configure(padding=(0, button_height//4))  # 縦方向のパディングで高さを調整
+        
+        # 下段フレーム（コピー・クリアボタン用）
+        bottom_button_frame = ttk.Frame(button_frame)
+        bottom_button_frame.grid(row=1, column=0, columnspan=2, sticky="ew")
+        bottom_button_frame.columnconfigure(0, weight=1)
+        bottom_button_frame.columnconfigure(1, weight=1)
+        bottom_button_frame.columnconfigure(2, weight=1)
+        
+        # コピーボタン（左）
+        self.copy_btn = ttk.Button(bottom_button_frame, text="コピー", command=self.copy_output)
+        self.copy_btn.grid(row=0, column=0, sticky="ew", padx=(0, self.scale_size(2)))
+        
+        # クリアボタン（中央）
+        self.clear_btn = ttk.Button(bottom_button_frame, text="クリア", command=self.clear_text)
+        self.clear_btn.grid(row=0, column=1, sticky="ew", padx=self.scale_size(2))
+        
+        # 中止ボタン（右、変換中のみ有効）
+        self.cancel_btn = ttk.Button(bottom_button_frame, text="中止", command=self.cancel_conversion,
+                                     state='disabled')
+        self.cancel_btn.grid(row=0, column=2, sticky="ew", padx=(self.scale_size(2), 0))
+        
+        # Escキーでも変換を中止
+        self.root.bind('<Escape>', lambda event: self.cancel_conversion())
+        
+        # 出力ボックス
+        ttk.Label(main_frame, text="出力ボックス:").grid(row=5, column=0, sticky=tk.W, pady=(self.scale_size(10), self.scale_size(5)))
+        output_height = self.scale_size(6)
+        self.output_text = scrolledtext.ScrolledText(main_frame, height=output_height, width=input_width)
+        self.output_text.grid(row=6, column=0, columnspan=2, sticky="nsew", pady=(0, self.scale_size(10)))
+        
+        # 右クリックメニューを設定
+        self.setup_text_context_menu(self.output_text)
+        
+        # ステータスバー
+        self.status_var = tk.StringVar()
+        self.status_var.set("準備完了")
+        status_bar = ttk.Label(main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
+        status_bar.grid(row=7, column=0, columnspan=2, sticky="ew", pady=(self.scale_size(10), 0))
+        
+        # 行と列の重みを設定（レスポンシブデザイン）
+        # 入力ボックスと出力ボックスを等しい重みで拡張
+        main_frame.rowconfigure(1, weight=2)  # 入力ボックス（より大きな重み）
+        main_frame.rowconfigure(6, weight=2)  # 出力ボックス（より大きな重み）
+        
+        # 折りたたみ可能なセクションには最小の重み
+        main_frame.rowconfigure(2, weight=0)  # 方針セクション
+        main_frame.rowconfigure(3, weight=0)  # 参考セクション
+        main_frame.rowconfigure(4, weight=0)  # ボタンセクション
+        main_frame.rowconfigure(5, weight=0)  # 出力ラベル
+        main_frame.rowconfigure(7, weight=0)  # ステータスバー
+        
+        # カラムも拡張可能に
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.columnconfigure(1, weight=1)
+        
+        # 折りたたみ状態を復元
+        self.apply_section_visibility()
+        
+    def on_input_key_release(self, event):
+        """入力ボックスのキーリリースイベント処理"""
+        # 特定のキー（Ctrl、Alt、Shift等）は無視
+        if event.keysym in ['Control_L', 'Control_R', 'Alt_L', 'Alt_R', 
+                           'Shift_L', 'Shift_R', 'Menu', 'Super_L', 'Super_R']:
+            return
+            
+        # 入力テキスト全体を取得
+        current_text = self.input_text.get(1.0, tk.END)
+        
+        # 末尾の連続改行をチェック
+        if current_text.endswith('\n\n\n'):
+            # 3連続改行を検出したら変換を開始
+            # まず末尾の改行を削除
+            clean_text = current_text.rstrip('\n')
+            self.input_text.delete(1.0, tk.END)
+            self.input_text.insert(1.0, clean_text)
+            
+            # 変換を開始
+            self.convert_text()
+            return
+        
+        # 先行変換の入力停止待ちを（再）開始
+        self._schedule_speculation()
+    
+    def _schedule_speculation(self):
+        """入力が止まってから一定時間後に先行変換を始めるよう予約（デバウンス）"""
+        if not self.settings["speculative_conversion"]:
+            return
+        
+        if self._speculation_timer is not None:
+            self.root.after_cancel(self._speculation_timer)
+            self._speculation_timer = None
+        
+        # 入力が変わったら、古い入力に対する先行変換は中止
+        if self.speculative_job and self.speculative_job.input_text != self.input_text.get(1.0, tk.END).strip():
+            self._discard_speculation()
+        
+        self._speculation_timer = self.root.after(self.settings["speculative_idle_ms"], self._start_speculation)
+    
+    def _start_speculation(self):
+        """現在の入力で先行変換を開始（結果は変換ボタンが押されるまで表示しない）"""
+        self._speculation_timer = None
+        if self.current_job:
+            return
+        
+        input_text = self.input_text.get(1.0, tk.END).strip()
+        if len(input_text) < self.settings["speculative_min_chars"]:
+            return
+        
+        job = ConversionJob(
+            input_text,
+            conversion_policy=self.policy_text.get(1.0, tk.END).strip(),
+            reference_text=self.reference_text.get(1.0, tk.END).strip()
+        )
+        if self.speculative_job and self._same_request(self.speculative_job, job):
+            return
+        
+        # 回数・文字数の上限を超える場合は先行しない
+        if not self.speculation_budget.try_acquire(len(input_text)):
+            print("先行変換の上限に達したため、先行変換を行いません")
+            return
+        
+        self._discard_speculation()
+        print(f"変換 #{job.job_id} を先行して開始します")
+        self.speculative_job = job
+        self.engine.submit(job)
+    
+    def _discard_speculation(self):
+        """先行変換を破棄（実行中であれば中止）"""
+        if self.speculative_job and self.speculative_job is not self.current_job:
+            self.speculative_job.cancel()
+        self.speculative_job = None
+        self.speculative_result = None
+    
+    @staticmethod
+    def _same_request(job_a: ConversionJob, job_b: ConversionJob) -> bool:
+        """入力・変換方針・参考文章がすべて同じかどうか"""
+        return (job_a.input_text == job_b.input_text
+                and job_a.conversion_policy == job_b.conversion_policy
+                and job_a.reference_text == job_b.reference_text)
+    
+    def toggle_policy_section(self):
+        """変換の方針セクションの表示/非表示を切り替え"""
+        is_visible = self.settings.get("show_policy_section", True)
+        self.settings["show_policy_section"] = not is_visible
+        self.apply_section_visibility()
+        
+    def toggle_reference_section(self):
+        """参考用セクションの表示/非表示を切り替え"""
+        is_visible = self.settings.get("show_reference_section", True)
+        self.settings["show_reference_section"] = not is_visible
+        self.apply_section_visibility()
+        
+    def apply_section_visibility(self):
+        """セクションの表示状態を適用"""
+        # 変換の方針セクション
+        show_policy = self.settings.get("show_policy_section", True)
+        if show_policy:
+            self.policy_content_frame.grid()
+            self.policy_toggle_btn.config(text="▼ 変換の方針")
+        else:
+            self.policy_content_frame.grid_remove()
+            self.policy_toggle_btn.config(text="▶ 変換の方針")
+            
+        # 参考用セクション
+        show_reference = self.settings.get("show_reference_section", True)
+        if show_reference:
+            self.reference_content_frame.grid()
+            self.reference_toggle_btn.config(text="▼ 参考用ファイル")
+        else:
+            self.reference_content_frame.grid_remove()
+            self.reference_toggle_btn.config(text="▶ 参考用ファイル")
+    
+    def setup_text_context_menu(self, text_widget):
+        """テキストウィジェットに右クリックメニューを設定"""
+        context_menu = tk.Menu(text_widget, tearoff=0)
+        
+        # 入力ボックスの場合は変換開始メニューを追加
+        if hasattr(self, 'input_text') and text_widget == self.input_text:
+            context_menu.add_command(label="変換開始", command=self.convert_text)
+            context_menu.add_separator()
+
+        # 出力ボックスの場合は出力専用メニューを追加
+        if hasattr(self, 'output_text') and text_widget == self.output_text:
+            context_menu.add_command(label="出力をクリップボードにコピー", command=self.copy_output)
+            context_menu.add_separator()
+            
+        # 基本的なメニュー項目を追加
+        context_menu.add_command(label="切り取り", command=lambda: self.text_cut(text_widget))
+        context_menu.add_command(label="コピー", command=lambda: self.text_copy(text_widget))
+        context_menu.add_command(label="貼り付け", command=lambda: self.text_paste(text_widget))
+        context_menu.add_separator()
+        context_menu.add_command(label="全て選択", command=lambda: self.text_select_all(text_widget))
+                
+        # 右クリックイベントをバインド
+        def show_context_menu(event):
+            try:
+                context_menu.tk_popup(event.x_root, event.y_root)
+            finally:
+                context_menu.grab_release()
+        
+        text_widget.bind("<Button-3>", show_context_menu)  # 右クリック
+        
+        # ミドルボタンクリック（Button-2）でのペーストを無効化
+        def disable_middle_click(event):
+            return "break"  # イベントの伝播を停止
+        
+        text_widget.bind("<Button-2>", disable_middle_click)  # ミドルボタンクリック
+        text_widget.bind("<ButtonRelease-2>", disable_middle_click)  # ミドルボタンリリース
+        
+    def text_cut(self, text_widget):
+        """テキストを切り取り"""
+        try:
+            text_widget.event_generate("<<Cut>>")
+        except tk.TclError:
+            pass
+    
+    def text_copy(self, text_widget):
+        """テキストをコピー"""
+        try:
+            text_widget.event_generate("<<Copy>>")
+        except tk.TclError:
+            pass
+    
+    def text_paste(self, text_widget):
+        """テキストを貼り付け"""
+        try:
+            text_widget.event_generate("<<Paste>>")
+        except tk.TclError:
+            pass
+    
+    def text_select_all(self, text_widget):
+        """全てのテキストを選択"""
+        try:
+            text_widget.tag_add(tk.SEL, "1.0", tk.END)
+            text_widget.mark_set(tk.INSERT, "1.0")
+            text_widget.see(tk.INSERT)
+        except tk.TclError:
+            pass
+        
+    def rescan_reference_files(self):
+        """参考フォルダをすぐに調べ直す（結果は監視スレッドから届く）"""
+        self.reference_watcher.rescan()
+        self.status_var.set("参考用ファイルを確認しています...")
+        
+    def update_reference_files(self):
+        """監視スレッドの参考用ファイルリストが変わっていれば画面に反映"""
+        generation = self.reference_watcher.generation
+        if generation == self._reference_generation:
+            return
+        self._reference_generation = generation
+        
+        # フォルダからの相対パス（サブフォルダのファイルは「フォルダ/ファイル名」）
+        self.reference_files = list(self.reference_watcher.snapshot())
+        
+        # コンボボックスを更新
+        self.reference_selector['values'] = [""] + self.reference_files
+        
+        # 変換中の表示は上書きしない
+        if not self.current_job:
+            self.status_var.set(f"参考用ファイル {len(self.reference_files)} 件を読み込みました")
+        
+        # 選択中と最近使ったファイルを先読みしておく
+        self.reference_cache.preload([self.reference_selector.get()] + self.settings["recent_reference_files"],
+                                     self.reference_watcher.files())
+        
+    def _poll_reference_files(self):
+        """参考用ファイルリストの変更を定期的に確認（メインスレッドで実行）"""
+        self.update_reference_files()
+        self.root.after(self.REFERENCE_POLL_INTERVAL_MS, self._poll_reference_files)
+            
+    def on_reference_selected(self, event=None):
+        """参考用ファイルが選択されたときの処理（ファイルの読み込みでメインスレッドを止めない）"""
+        selected_file = self.reference_selector.get()
+        if selected_file:
+            future = self.reference_cache.request(selected_file,
+                                                  self.reference_watcher.files().get(selected_file))
+            self._pending_reference = (selected_file, future)
+            if not future.done():
+                self.status_var.set("参考用ファイルを読み込んでいます...")
+            self._apply_reference_content()
+        else:
+            self._pending_reference = None
+            self.reference_text.delete(1.0, tk.END)
+            self.settings["selected_reference_file"] = ""
+            
+    def _apply_reference_content(self):
+        """選択された参考用ファイルの読み込みが終わっていれば内容を表示（終わるまで定期的に確認）"""
+        if self._pending_reference is None:
+            return
+        selected_file, future = self._pending_reference
+        if not future.done():
+            self.root.after(self.ENGINE_POLL_INTERVAL_MS, self._apply_reference_content)
+            return
+        self._pending_reference = None
+        
+        try:
+            content = future.result()
+        except Exception as e:
+            messagebox.showerror("エラー", f"ファイルの読み込みに失敗しました: {str(e)}")
+            return
+        
+        self.reference_text.delete(1.0, tk.END)
+        self.reference_text.insert(1.0, content)
+        
+        self.settings["selected_reference_file"] = selected_file
+        recent = [selected_file] + [f for f in self.settings["recent_reference_files"] if f != selected_file]
+        self.settings["recent_reference_files"] = recent[:self.RECENT_REFERENCE_FILES]
+        if not self.current_job:
+            self.status_var.set(f"参考用ファイル {selected_file} を読み込みました")
+            
+    def convert_text(self):
+        """テキストの変換処理"""
+        input_text = self.input_text.get(1.0, tk.END).strip()
+        if not input_text:
+            # ダイアログではなくステータス表示と警告音のみ
+            self.status_var.set("警告: 入力テキストが空です")
+            try:
+                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+            except Exception:
+                pass
+            return
+            
+        # 設定を保存
+        self.save_settings()
+        
+        # 実行中の変換があれば中止し、新しい変換に置き換える
+        if self.current_job:
+            print(f"変換 #{self.current_job.job_id} を新しい変換で置き換えます")
+            self.current_job.cancel()
+        # 変換方針と参考文章はここ（メインスレッド）で読み取ってジョブに渡す
+        job = ConversionJob(
+            input_text,
+            conversion_policy=self.policy_text.get(1.0, tk.END).strip(),
+            reference_text=self.reference_text.get(1.0, tk.END).strip()
+        )
+        
+        # 同じ内容の先行変換があればそれを引き継ぐ（完了済みなら即座に表示）
+        if self._speculation_timer is not None:
+            self.root.after_cancel(self._speculation_timer)
+            self._speculation_timer = None
+        speculative_job = self.speculative_job
+        speculative_result = self.speculative_result
+        if speculative_job and self._same_request(speculative_job, job):
+            self.speculative_job = None
+            self.speculative_result = None
+            self.current_job = speculative_job
+            self.cancel_btn.config(state='normal')
+            if speculative_result is not None:
+                self._update_output(speculative_job, speculative_result)
+                if speculative_result:
+                    self.status_var.set("変換完了（先行変換）")
+            else:
+                self.status_var.set("変換中（先行変換を引き継ぎ）...")
+            return
+        self._discard_speculation()
+        
+        self.current_job = job
+        
+        self.cancel_btn.config(state='normal')
+        self.status_var.set("変換中...")
+        
+        # 変換エンジンのイベントループで実行
+        self.engine.submit(job)
+        
+    def cancel_conversion(self):
+        """実行中の変換を中止"""
+        if not self.current_job:
+            return
+        self.current_job.cancel()
+        self._finish_job()
+        self.status_var.set("変換を中止しました")
+        
+    def _finish_job(self):
+        """現在のジョブを終了状態にする"""
+        self.current_job = None
+        self.cancel_btn.config(state='disabled')
+        
+    def _poll_engine_events(self):
+        """変換エンジンから届いたイベントを処理（メインスレッドで実行）"""
+        try:
+            while True:
+                event = self.engine.events.get_nowait()
+                # 先行変換の結果は、変換ボタンが押されるまで保持するだけ
+                if event.job is self.speculative_job and event.job is not self.current_job:
+                    self._handle_speculative_event(event)
+                elif event.kind == ConversionEngine.PARTIAL:
+                    self._show_partial_output(event.job, event.payload)
+                elif event.kind == ConversionEngine.STATUS:
+                    self._show_job_status(event.job, event.payload)
+                elif event.kind == ConversionEngine.DONE:
+                    self._update_output(event.job, event.payload)
+                elif event.kind == ConversionEngine.ERROR:
+                    error_msg = f"変換に失敗しました: {str(event.payload)}"
+                    if event.job.retry_stats.retries:
+                        error_msg += f"\n（{event.job.retry_stats}）"
+                    self._show_error(event.job, error_msg)
+        except queue.Empty:
+            pass
+        self.root.after(self.ENGINE_POLL_INTERVAL_MS, self._poll_engine_events)
+        
+    def _handle_speculative_event(self, event):
+        """先行変換のイベントを処理"""
+        if event.kind == ConversionEngine.DONE:
+            self.speculative_result = event.payload
+        elif event.kind in (ConversionEngine.ERROR, ConversionEngine.CANCELLED):
+            # 失敗した先行変換は捨て、変換ボタン押下時に改めて変換する
+            self.speculative_job = None
+            self.speculative_result = None
+        
+    def _show_job_status(self, job: ConversionJob, message: str):
+        """現在のジョブであればステータスを表示"""
+        if job is self.current_job:
+            self.status_var.set(message)
+        
+    def _show_partial_output(self, job: ConversionJob, partial_text: str):
+        """ストリーミング受信中の出力テキストを表示（コピーと完了音は完了時のみ）"""
+        # 中止・置き換え済みのジョブの結果は反映しない
+        if job is not self.current_job:
+            return
+        self.output_text.delete(1.0, tk.END)
+        self.output_text.insert(1.0, partial_text)
+        self.output_text.see(tk.END)
+        self.status_var.set("変換中（受信中）...")
+        
+    def _update_output(self, job: ConversionJob, corrected_text: str):
+        """出力テキストを更新"""
+        # 中止・置き換え済みのジョブの結果は出力にもクリップボードにも反映しない
+        if job is not self.current_job:
+            return
+        self._finish_job()
+        
+        self.output_text.delete(1.0, tk.END)
+        if not corrected_text:
+            # 空の結果はクリップボードにコピーせず、ステータス表示と警告音で知らせる
+            if job.prepass and not job.prepass.text:
+                self.status_var.set("警告: フィラーなどを取り除くと、変換する文章が残りませんでした")
+            else:
+                self.status_var.set("警告: 変換結果が空です")
+            try:
+                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+            except Exception:
+                pass
+            return
+        self.output_text.insert(1.0, corrected_text)
+        
+        # クリップボードにコピー
+        try:
+            pyperclip.copy(corrected_text)
+        except Exception as e:
+            print(f"クリップボードへのコピーに失敗: {e}")
+            
+        # 完了音を再生
+        try:
+            winsound.MessageBeep(winsound.MB_OK)
+        except Exception as e:
+            print(f"音声再生に失敗: {e}")
+            
+        if job.skipped:
+            if corrected_text != job.input_text:
+                self.status_var.set("変換完了（整った入力のため前処理のみ）")
+            else:
+                self.status_var.set("変換完了（整った入力のためそのまま）")
+        elif job.from_cache:
+            self.status_var.set("変換完了（キャッシュ）")
+        elif job.retry_stats.retries:
+            self.status_var.set(f"変換完了（{job.retry_stats}）")
+        else:
+            self.status_var.set("変換完了")
+        
+    def _show_error(self, job: ConversionJob, error_msg: str):
+        """エラーメッセージを表示"""
+        if job is not self.current_job:
+            return
+        self._finish_job()
+        messagebox.showerror("エラー", error_msg)
+        self.status_var.set("エラーが発生しました")
+        
+    def copy_output(self):
+        """出力テキストをクリップボードにコピー"""
+        output = self.output_text.get(1.0, tk.END).strip()
+        if output:
+            try:
+                pyperclip.copy(output)
+                self.status_var.set("クリップボードにコピーしました")
+            except Exception as e:
+                messagebox.showerror("エラー", f"クリップボードへのコピーに失敗しました: {str(e)}")
+        else:
+            # ダイアログではなくステータス表示と警告音のみ
+            self.status_var.set("警告: 出力テキストが空です")
+            try:
+                winsound.MessageBeep(winsound.MB_ICONEXCLAMATION)
+            except Exception:
+                pass
+            
+    def clear_text(self):
+        """入力と出力をクリア"""
+        self._discard_speculation()
+        self.input_text.delete(1.0, tk.END)
+        self.output_text.delete(1.0, tk.END)
+        self.status_var.set("クリアしました")
+        
+    def save_settings(self):
+        """設定をJSONファイルに保存"""
+        try:
+            self.settings["conversion_policy"] = self.policy_text.get(1.0, tk.END).strip()
+            self.settings["reference_text"] = self.reference_text.get(1.0, tk.END).strip()
+            self.settings["selected_reference_file"] = self.reference_selector.get()
+            
+            # ウィンドウのサイズとポジションを保存（DPIスケールを元に戻す）
+            geometry = self.root.geometry()
+            # geometry形式: "幅x高さ+x座標+y座標" (例: "800x600+100+50")
+            if 'x' in geometry:
+                size_part, position_part = geometry.split('+', 1)
+                width, height = map(int, size_part.split('x'))
+                
+                # DPIスケールを元に戻して保存
+                self.settings["window_width"] = int(width / self.scale_factor)
+                self.settings["window_height"] = int(height / self.scale_factor)
+                
+                # ポジション情報があれば保存
+                if '+' in position_part:
+                    x_pos, y_pos = position_part.split('+')
+                    self.settings["window_x"] = int(int(x_pos) / self.scale_factor)
+                    self.settings["window_y"] = int(int(y_pos) / self.scale_factor)
+                elif position_part:
+                    # "x+y" の形式の場合
+                    if '+' in position_part or '-' in position_part[1:]:
+                        coords = position_part.replace('-', '+-').split('+')
+                        if len(coords) >= 2:
+                            self.settings["window_x"] = int(int(coords[0]) / self.scale_factor)
+                            self.settings["window_y"] = int(int(coords[1]) / self.scale_factor)
+            
+            with open(self.config_file, 'w', encoding='utf-8') as f:
+                json.dump(self.settings, f, ensure_ascii=False, indent=2)
+                
+        except Exception as e:
+            print(f"設定の保存に失敗: {e}")
+            
+    def load_settings(self):
+        """設定をJSONファイルから読み込み"""
+        try:
+            if os.path.exists(self.config_file):
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    # 初期値に上書きすることで、新しく追加された設定項目も既定値を持つ
+                    self.settings.update(json.load(f))
+                
+                # GUIに設定を反映
+                self.policy_text.delete(1.0, tk.END)
+                self.policy_text.insert(1.0, self.settings.get("conversion_policy", ""))
+                
+                self.reference_text.delete(1.0, tk.END)
+                self.reference_text.insert(1.0, self.settings.get("reference_text", ""))
+                
+                # 参考ファイルが指定されている場合、それを選択
+                selected_file = self.settings.get("selected_reference_file", "")
+                if selected_file:
+                    # 画面の構築が終わった後に設定
+                    self.root.after(100, lambda: self._set_reference_file(selected_file))
+                    
+        except Exception as e:
+            print(f"設定の読み込みに失敗: {e}")
+    
+    def _set_reference_file(self, selected_file: str):
+        """参考ファイルを設定する補助メソッド"""
+        # ファイルリストは監視スレッドから遅れて届くため、ファイルの有無で判断する
+        if os.path.isfile(os.path.join(self.reference_folder, selected_file)):
+            self.reference_selector.set(selected_file)
+            self.on_reference_selected()  # ファイル内容も読み込む
+            
+    def run(self):
+        """アプリケーションを実行"""
+        # 終了時に設定を保存
+        self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
+        self.root.mainloop()
+        
+    def on_closing(self):
+        """アプリケーション終了時の処理"""
+        self.save_settings()
+        if self.current_job:
+            self.current_job.cancel()
+        self._discard_speculation()
+        self.reference_watcher.close()
+        self.reference_cache.close()
+        self.engine.close()
+        self.root.destroy()
+
+
+def main():
+    """GUIを起動"""
+    app = VoiceCorrector()
+    app.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+extract_json_response の時間が入力の長さに比例することを確かめるための、壊れた長い応答の例
+
+テスト（test_extract_json.py）とベンチマーク（benchmarks/bench_extract_json.py）で共有する
+"""
+
+from typing import Callable, Dict
+
+
+def _repeat(unit: str, size: int) -> str:
+    return unit * (size // len(unit) + 1)
+
+
+# 名前 -> 約size文字の入力を作る関数
+PATHOLOGICAL_INPUTS: Dict[str, Callable[[int], str]] = {
+    # 閉じない '{' の連続（括弧の対応を探す走査が入れ子で増える）
+    "open_braces": lambda size: _repeat("{", size),
+    # corrected_textを含む閉じないオブジェクトの入れ子（旧nested_patternが爆発的に後戻りした形）
+    "nested_keys": lambda size: _repeat('{"corrected_text": {"a": ', size),
+    # 閉じない値の中のエスケープされた引用符
+    "escaped_quotes": lambda size: '{"corrected_text": "' + _repeat('\\"', size),
+    # 閉じない値の中のバックスラッシュの連続（旧text_patternが終わらなかった形）
+    "backslash_run": lambda size: '{"corrected_text": "' + _repeat("\\", size),
+    # 閉じない長い値
+    "unclosed_string": lambda size: '{"corrected_text": "' + _repeat("あいうえお", size),
+    # 閉じない '[' の連続
+    "open_brackets": lambda size: _repeat("[", size),
+    # json.loadsの再帰の上限を超える深い入れ子（対応は取れている）
+    "deep_nesting": lambda size: '{"a":' * (size // 6) + '"corrected_text"' + "}" * (size // 6),
+    # 値のないキーとコードブロックの開始の繰り返し
+    "repeated_fences": lambda size: _repeat('```json\n{"corrected_text": ', size),
+}
@@ -0,0 +1,124 @@
+"""
+バッチ処理のテスト（読み込めない入力は1件の失敗として記録し、残りを変換する）
+
+変換エンジンの代わりに、別スレッドで入力に印を付けて返すエンジンを使う
+実行: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import Future
+
+from corrector.batch import BatchCheckpoint, BatchItem, BatchRunner, read_batch_items
+
+
+def make_items(texts):
+    return [BatchItem(str(number), text) for number, text in enumerate(texts, 1)]
+
+
+class EchoEngine:
+    """submitされたジョブを別スレッドで「修正済み:」を付けて完了させる"""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+
+    def submit(self, job) -> Future:
+        future: Future = Future()
+        threading.Timer(self.delay, future.set_result, ["修正済み:" + job.input_text]).start()
+        return future
+
+
+class ThreadRecordingOutput(io.StringIO):
+    """書き込んだスレッドを記録する出力"""
+
+    def __init__(self):
+        super().__init__()
+        self.threads = set()
+
+    def write(self, text: str) -> int:
+        self.threads.add(threading.current_thread())
+        return super().write(text)
+
+
+class BatchInputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.workdir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.workdir.name, name)
+
+    def run_batch(self, input_path: str, items=None):
+        checkpoint = BatchCheckpoint(self.path("output.jsonl.checkpoint"))
+        output = io.StringIO()
+        runner = BatchRunner(EchoEngine(), output, workers=2, checkpoint=checkpoint)
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = runner.run(items if items is not None else read_batch_items(input_path))
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        return stats, records
+
+    def test_broken_lines_become_error_records(self):
+        with open(self.path("input.jsonl"), "wb") as f:
+            f.write('{"id": "a", "text": "一件目"}\n'.encode("utf-8"))
+            f.write(b'{"id": "broken", "text": \n')
+            f.write(b'{"id": "number", "text": 5}\n')
+            f.write(b'["not", "an", "object"]\n')
+            f.write(b'{"id": "latin1", "text": "caf\xe9"}\n')
+            f.write('{"id": "b", "text": "二件目"}\n'.encode("utf-8"))
+
+        stats, records = self.run_batch(self.path("input.jsonl"))
+
+        by_id = {record["id"]: record for record in records}
+        self.assertEqual(by_id["a"]["corrected_text"], "修正済み:一件目")
+        self.assertEqual(by_id["b"]["corrected_text"], "修正済み:二件目")
+        for item_id in ("2", "number", "4", "5"):
+            self.assertIn("error", by_id[item_id])
+        self.assertEqual((stats.succeeded, stats.failed), (2, 4))
+
+    def test_writes_on_calling_thread(self):
+        output = ThreadRecordingOutput()
+        runner = BatchRunner(EchoEngine(), output, workers=3)
+        items = make_items(["一", "二", "三", "四", "五"])
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = runner.run(iter(items))
+        self.assertEqual(stats.succeeded, 5)
+        self.assertEqual(output.threads, {threading.current_thread()})
+
+    def test_failed_input_keeps_finished_results(self):
+        def items():
+            yield from make_items(["一", "二", "三"])
+            raise OSError("入力の読み込みに失敗")
+
+        with self.assertRaises(OSError):
+            self.run_batch("", items=items())
+
+        with open(self.path("output.jsonl.checkpoint"), encoding="utf-8") as f:
+            recorded = [json.loads(line)["id"] for line in f]
+        self.assertEqual(sorted(recorded), ["1", "2", "3"])
+
+    def test_undecodable_text_file(self):
+        folder = self.path("transcripts")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "good.txt"), "w", encoding="utf-8") as f:
+            f.write("読める文章")
+        with open(os.path.join(folder, "bad.txt"), "wb") as f:
+            f.write("読めない".encode("cp932"))
+
+        stats, records = self.run_batch(folder)
+
+        by_id = {record["id"]: record for record in records}
+        self.assertIn("error", by_id["bad.txt"])
+        self.assertEqual(by_id["good.txt"]["corrected_text"], "修正済み:読める文章")
+        self.assertEqual((stats.succeeded, stats.failed), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+CircuitBreaker と RetryPolicy のテスト（半開状態で試行を1回だけ許可する）
+
+実行: python -m unittest discover tests
+"""
+
+import asyncio
+import contextlib
+import io
+import unittest
+
+from corrector import APIError, CircuitBreaker, CircuitOpenError, RetryPolicy, RetryStats
+
+
+def open_breaker() -> CircuitBreaker:
+    """待ち時間が過ぎて、次の呼び出しで半開状態になるブレーカー"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+    breaker.record_failure()
+    return breaker
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30.0)
+        breaker.record_failure()
+        self.assertFalse(breaker.before_call())
+        breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_half_open_allows_single_trial(self):
+        breaker = open_breaker()
+        self.assertTrue(breaker.before_call())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertFalse(breaker.before_call())
+
+    def test_failed_trial_reopens(self):
+        breaker = open_breaker()
+        breaker.before_call()
+        breaker.reset_seconds = 30.0
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_call()
+
+    def test_aborted_trial_lets_next_caller_try(self):
+        breaker = open_breaker()
+        self.assertTrue(breaker.before_call())
+        breaker.abort_trial()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.before_call())
+
+
+class RetryPolicyTrialTest(unittest.TestCase):
+
+    def run_policy(self, func, breaker: CircuitBreaker) -> str:
+        policy = RetryPolicy(max_attempts=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(policy.run(func, RetryStats(), breaker))
+
+    def test_non_retryable_trial_does_not_block(self):
+        breaker = open_breaker()
+
+        async def bad_request():
+            raise APIError("400", status_code=400, retryable=False)
+
+        with self.assertRaises(APIError):
+            self.run_policy(bad_request, breaker)
+
+        async def ok():
+            return "ok"
+
+        self.assertEqual(self.run_policy(ok, breaker), "ok")
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_cancelled_trial_does_not_block(self):
+        breaker = open_breaker()
+        policy = RetryPolicy()
+
+        async def scenario():
+            started = asyncio.Event()
+
+            async def slow():
+                started.set()
+                await asyncio.sleep(10)
+                return "slow"
+
+            trial = asyncio.create_task(policy.run(slow, RetryStats(), breaker))
+            await started.wait()
+            with self.assertRaises(CircuitOpenError):
+                await policy.run(slow, RetryStats(), breaker)
+            trial.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await trial
+
+        asyncio.run(scenario())
+        self.assertTrue(breaker.before_call())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+extract_json_response のテスト（通常の応答の形式、壊れた長い応答の処理時間、ランダムな入力）
+
+実行: python -m unittest discover tests
+"""
+
+import json
+import random
+import time
+import unittest
+
+from corrector import ResponseParseError, extract_json_response, parse_corrected_text
+from pathological_inputs import PATHOLOGICAL_INPUTS
+
+# 100KBの壊れた応答1つにかけてよい時間（手元では最大でも0.25秒程度）
+TIME_BUDGET_SECONDS = 2.0
+
+
+def extract_or_error(content: str) -> object:
+    """抽出結果の文字列か、ResponseParseErrorならその例外クラスを返す"""
+    try:
+        return extract_json_response(content)
+    except ResponseParseError:
+        return ResponseParseError
+
+
+class ExtractJsonFormatsTest(unittest.TestCase):
+
+    def test_direct_json(self):
+        self.assertEqual(extract_json_response('{"corrected_text": "修正後"}'), "修正後")
+
+    def test_code_block(self):
+        content = '```json\n{"corrected_text": "修正後"}\n```'
+        self.assertEqual(extract_json_response(content), "修正後")
+
+    def test_embedded_in_prose(self):
+        content = '結果は以下の通りです。\n{"corrected_text": "括弧{}と\\"引用符\\""}\n以上です。'
+        self.assertEqual(extract_json_response(content), '括弧{}と"引用符"')
+
+    def test_nested_under_other_key(self):
+        content = '{"result": {"corrected_text": "入れ子"}}'
+        self.assertEqual(extract_json_response(content), "入れ子")
+
+    def test_skips_objects_without_key(self):
+        content = '{"note": "前置き"} {"corrected_text": "二つ目"}'
+        self.assertEqual(extract_json_response(content), "二つ目")
+
+    def test_value_in_broken_json(self):
+        content = '{"corrected_text": "値は読める", "extra": }'
+        self.assertEqual(extract_json_response(content), "値は読める")
+
+    def test_plain_text(self):
+        self.assertEqual(extract_json_response("  ただの文章です。  "), "ただの文章です。")
+
+    def test_unparseable_json(self):
+        with self.assertRaises(ResponseParseError):
+            extract_json_response('{"text": "corrected_textがない"}')
+
+    def test_structured_path_with_deep_nesting(self):
+        with self.assertRaises(ResponseParseError):
+            parse_corrected_text("{" * 200_000, structured=True)
+
+
+class PathologicalInputsTest(unittest.TestCase):
+
+    def test_bounded_time_on_100kb(self):
+        for name, make in PATHOLOGICAL_INPUTS.items():
+            content = make(100_000)
+            with self.subTest(name=name):
+                started_at = time.perf_counter()
+                result = extract_or_error(content)
+                elapsed = time.perf_counter() - started_at
+                self.assertTrue(result is ResponseParseError or isinstance(result, str))
+                self.assertLess(elapsed, TIME_BUDGET_SECONDS)
+
+
+class RandomInputsTest(unittest.TestCase):
+
+    TOKENS = ['{', '}', '[', ']', '"', '\\', ':', ',', ' ', '\n', '```', '```json\n',
+              '"corrected_text"', '"corrected_text": "', '"a"', '1', 'true', 'あいう', '\\"', '\\u30', '\\u3042']
+
+    def test_random_token_soup(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            content = "".join(rng.choice(self.TOKENS) for _ in range(rng.randint(0, 40)))
+            result = extract_or_error(content)
+            self.assertTrue(result is ResponseParseError or isinstance(result, str), repr(content))
+
+    def test_valid_object_in_random_prose(self):
+        rng = random.Random(1)
+        prose_tokens = ['説明', ' ', '\n', '```', 'json', ':', '「', '」', '"', '[', ']']
+        value_chars = 'あいう漢字 "\\/\n{}:,😀'
+        for _ in range(500):
+            value = "".join(rng.choice(value_chars) for _ in range(rng.randint(0, 30)))
+            prefix = "".join(rng.choice(prose_tokens) for _ in range(rng.randint(0, 10)))
+            suffix = "".join(rng.choice(prose_tokens) for _ in range(rng.randint(0, 10)))
+            content = prefix + json.dumps({"corrected_text": value}, ensure_ascii=rng.random() < 0.5) + suffix
+            self.assertEqual(extract_json_response(content), value, repr(content))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+上流の応答がチャット補完の形式でない場合のテスト（APIErrorの一種として扱う）
+
+実行: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from corrector import APIError, ConversionEngine, ConversionJob, MalformedResponseError, make_options
+
+
+class _FixedResponseHandler(BaseHTTPRequestHandler):
+    """server.body を server.content_type で返す"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", self.server.content_type)
+        self.send_header("Content-Length", str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+
+class MalformedResponseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FixedResponseHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        os.environ.setdefault("OPENROUTER_API_KEY", "test")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def correct(self, body: bytes, content_type: str, streaming: bool) -> Exception:
+        self.server.body = body
+        self.server.content_type = content_type
+        options = make_options({
+            "api_url": f"http://127.0.0.1:{self.server.server_address[1]}/",
+            "streaming": streaming,
+            "response_cache_enabled": False,
+        })
+        with contextlib.redirect_stdout(io.StringIO()), ConversionEngine(options) as engine:
+            with self.assertRaises(MalformedResponseError) as context:
+                engine.correct_sync(ConversionJob("テストの文章です。"))
+        return context.exception
+
+    def test_non_json_body(self):
+        error = self.correct(b"<html>Bad Gateway</html>", "text/html", streaming=False)
+        self.assertIsInstance(error, APIError)
+
+    def test_body_without_choices(self):
+        self.correct(b'{"id": "x"}', "application/json", streaming=False)
+
+    def test_invalid_sse_payload(self):
+        self.correct(b"data: {broken\n\n", "text/event-stream", streaming=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
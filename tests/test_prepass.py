@@ -0,0 +1,54 @@
+"""
+Prepass のテスト（取り除くのはフィラーと言い直しだけで、内容は残す）
+
+実行: python -m unittest discover tests
+"""
+
+import unittest
+
+from corrector import Prepass
+
+
+class PrepassTest(unittest.TestCase):
+
+    def setUp(self):
+        self.prepass = Prepass()
+
+    def apply(self, text: str) -> str:
+        return self.prepass.apply(text).text
+
+    def test_removes_fillers(self):
+        self.assertEqual(self.apply("えーと、明日の会議は、あのー、十時からです。"), "明日の会議は、十時からです。")
+
+    def test_keeps_words_starting_like_fillers(self):
+        self.assertEqual(self.apply("あのうちの一つを選んだ。"), "あのうちの一つを選んだ。")
+        self.assertEqual(self.apply("えーっ！本当に？"), "えーっ！本当に？")
+        self.assertEqual(self.apply("あのうえで話す"), "あのうえで話す")
+
+    def test_removes_lengthened_filler(self):
+        self.assertEqual(self.apply("あのーー今日は晴れです。"), "今日は晴れです。")
+
+    def test_removes_restarted_phrase(self):
+        self.assertEqual(self.apply("今日は、今日は会議です。"), "今日は会議です。")
+        self.assertEqual(self.apply("それは それは大変でした。"), "それは大変でした。")
+
+    def test_keeps_listed_words(self):
+        self.assertEqual(self.apply("バナナ、バナナ、バナナを買う"), "バナナ、バナナ、バナナを買う")
+        self.assertEqual(self.apply("はい、はい、わかりました。"), "はい、はい、わかりました。")
+
+    def test_keeps_emphatic_repetition(self):
+        self.assertEqual(self.apply("もっと、もっと頑張ろう。"), "もっと、もっと頑張ろう。")
+        self.assertEqual(self.apply("ちょっと、ちょっと待って"), "ちょっと、ちょっと待って")
+
+    def test_keeps_emphatic_punctuation(self):
+        self.assertEqual(self.apply("本当に！！すごい？？"), "本当に！！すごい？？")
+        self.assertEqual(self.apply("会議が、、あります。。"), "会議が、あります。")
+
+    def test_filler_only_input(self):
+        result = self.prepass.apply("えーと、あのー")
+        self.assertEqual(result.text, "")
+        self.assertEqual(result.removed_fillers, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+ReferenceFolderIndex のテスト（メモリ上の ReferenceIndex と同じ断片を選ぶ）
+
+実行: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from corrector import ReferenceFolderIndex, ReferenceIndex
+
+PASSAGE_CHARS = 50
+MAX_CHARS = 120
+TOP_K = 3
+REFERENCE_TEXT = "\n".join([
+    "お世話になっております。株式会社サンプルの山田です。",
+    "先日の打ち合わせでは、貴重なお時間をいただきありがとうございました。",
+    "ご提案いただいた資料について、社内で検討を進めております。",
+    "来週中には結果をご連絡できる見込みです。",
+    "引き続きどうぞよろしくお願いいたします。",
+] * 3)
+
+
+class ReferenceFolderIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        folder = os.path.join(self.workdir.name, "reference")
+        os.makedirs(folder)
+        with open(os.path.join(folder, "mail.txt"), "w", encoding="utf-8") as f:
+            f.write(REFERENCE_TEXT)
+        self.index = ReferenceFolderIndex(os.path.join(self.workdir.name, "index.sqlite3"), folder,
+                                          passage_chars=PASSAGE_CHARS)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.index.refresh()
+        self.in_memory = ReferenceIndex.from_text(REFERENCE_TEXT, PASSAGE_CHARS)
+
+    def tearDown(self):
+        self.index.close()
+        self.workdir.cleanup()
+
+    def test_find(self):
+        self.assertEqual(self.index.find(REFERENCE_TEXT + "\n"), "mail.txt")
+        self.assertIsNone(self.index.find("別の文章"))
+
+    def test_select_matches_in_memory_index(self):
+        query = "資料の検討結果は来週ご連絡します"
+        selected = self.index.select(query, MAX_CHARS, TOP_K, path="mail.txt")
+        self.assertTrue(selected)
+        self.assertEqual(selected, self.in_memory.select(query, MAX_CHARS, TOP_K))
+
+    def test_select_without_common_bigrams_uses_leading_passages(self):
+        for query in ("ABC XYZ", "明日", "テスト", "あ"):
+            with self.subTest(query=query):
+                selected = self.index.select(query, MAX_CHARS, TOP_K, path="mail.txt")
+                self.assertTrue(selected)
+                self.assertEqual(selected, self.in_memory.select(query, MAX_CHARS, TOP_K))
+                self.assertTrue(self.index.select(query, MAX_CHARS, TOP_K))
+
+    def test_select_unknown_path(self):
+        self.assertEqual(self.index.select("資料", MAX_CHARS, TOP_K, path="missing.txt"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
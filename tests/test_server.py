@@ -0,0 +1,68 @@
+"""
+変換サーバーの要求の検証のテスト（不正な要求はAPIを呼ばずに400を返す）
+
+実行: python -m unittest discover tests
+"""
+
+import contextlib
+import io
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from corrector import make_options
+from corrector.server import CorrectionServer
+
+
+class RequestValidationTest(unittest.TestCase):
+
+    def setUp(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.server = CorrectionServer(make_options({"server_port": 0}))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.server.server_close()
+
+    def post(self, path: str, body: bytes):
+        """POSTして (ステータス, 応答のJSON) を返す"""
+        url = f"http://127.0.0.1:{self.server.server_address[1]}{path}"
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            with contextlib.redirect_stdout(io.StringIO()), urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def assert_bad_request(self, record):
+        for path in ("/correct", "/correct/stream"):
+            with self.subTest(path=path, record=record):
+                status, response = self.post(path, json.dumps(record, ensure_ascii=False).encode("utf-8"))
+                self.assertEqual(status, 400)
+                self.assertIn("invalid request", response["error"])
+
+    def test_missing_or_non_string_text(self):
+        self.assert_bad_request({})
+        self.assert_bad_request({"text": 5})
+
+    def test_empty_text(self):
+        self.assert_bad_request({"text": ""})
+        self.assert_bad_request({"text": " \n　"})
+
+    def test_non_string_policy_and_reference(self):
+        self.assert_bad_request({"text": "テスト", "policy": 5})
+        self.assert_bad_request({"text": "テスト", "reference": 5})
+        self.assert_bad_request({"text": "テスト", "reference": ["参考"]})
+
+    def test_not_an_object(self):
+        self.assert_bad_request(["text"])
+        status, _ = self.post("/correct", b"{broken")
+        self.assertEqual(status, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+CorrectedTextStreamParser のテスト
+
+実行: python -m unittest discover tests
+"""
+
+import json
+import random
+import unittest
+
+from corrector import CorrectedTextStreamParser
+
+
+def random_chunks(text: str, rng: random.Random, max_size: int = 7):
+    """textを1〜max_size文字のランダムな長さのチャンクに分ける"""
+    i = 0
+    while i < len(text):
+        size = rng.randint(1, max_size)
+        yield text[i:i + size]
+        i += size
+
+
+def feed_all(chunks) -> CorrectedTextStreamParser:
+    parser = CorrectedTextStreamParser()
+    emitted = "".join(parser.feed(chunk) for chunk in chunks)
+    assert emitted == parser.text
+    return parser
+
+
+class StreamParserTest(unittest.TestCase):
+
+    SAMPLES = [
+        "",
+        "こんにちは。今日は良い天気です。",
+        'He said "hello" \\ goodbye / \b\f\n\r\t end',
+        "絵文字😀と記号𠮷（サロゲートペア）",
+        '{"corrected_text": "入れ子に見える値"}',
+        "\u0000\u001f制御文字",
+    ]
+
+    def test_whole_response(self):
+        for sample in self.SAMPLES:
+            for ensure_ascii in (False, True):
+                response = json.dumps({"corrected_text": sample}, ensure_ascii=ensure_ascii)
+                parser = feed_all([response])
+                self.assertTrue(parser.done)
+                self.assertEqual(parser.text, sample)
+
+    def test_random_chunking(self):
+        rng = random.Random(0)
+        for sample in self.SAMPLES:
+            for ensure_ascii in (False, True):
+                response = json.dumps({"corrected_text": sample}, ensure_ascii=ensure_ascii)
+                for _ in range(50):
+                    parser = feed_all(random_chunks(response, rng))
+                    self.assertTrue(parser.done)
+                    self.assertEqual(parser.text, sample)
+
+    def test_random_text_round_trip(self):
+        rng = random.Random(1)
+        alphabet = 'あいう漢字abc "\\/\n\té　😀𠮷{}:,'
+        for _ in range(200):
+            sample = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+            response = json.dumps({"note": "x", "corrected_text": sample}, ensure_ascii=rng.random() < 0.5)
+            parser = feed_all(random_chunks(response, rng, max_size=rng.randint(1, 16)))
+            self.assertEqual(parser.text, sample)
+
+    def test_escape_split_across_chunks(self):
+        response = '{"corrected_text": "a\\"b\\\\c\\nd"}'
+        # エスケープの '\\' の直後で区切る
+        split = response.index('\\') + 1
+        parser = feed_all([response[:split], response[split:]])
+        self.assertEqual(parser.text, 'a"b\\c\nd')
+
+    def test_unicode_escape_split_across_chunks(self):
+        response = '{"corrected_text": "\\u3042\\u3044"}'
+        # 1文字ずつ渡すと \uXXXX の途中で必ず区切られる
+        parser = feed_all(list(response))
+        self.assertEqual(parser.text, "あい")
+
+    def test_surrogate_pair_split_across_chunks(self):
+        response = json.dumps({"corrected_text": "前😀後"}, ensure_ascii=True)
+        low = response.index("\\ude00")
+        for split in (low - 2, low, low + 3):
+            parser = CorrectedTextStreamParser()
+            first = parser.feed(response[:split])
+            # 上位サロゲートだけを単独で出力しない
+            self.assertNotIn("\ud83d", first)
+            parser.feed(response[split:])
+            self.assertEqual(parser.text, "前😀後")
+
+    def test_key_appearing_as_value(self):
+        response = '{"label": "corrected_text", "other": ["corrected_text"], "corrected_text": "本物"}'
+        for chunk_size in (1, 3, len(response)):
+            chunks = [response[i:i + chunk_size] for i in range(0, len(response), chunk_size)]
+            self.assertEqual(feed_all(chunks).text, "本物")
+
+    def test_key_with_whitespace_before_value(self):
+        parser = feed_all(['{"corrected_text"  \n :\t  "値"}'])
+        self.assertEqual(parser.text, "値")
+
+    def test_partial_output_is_prefix(self):
+        sample = "途中まで届いた文章を少しずつ表示する。" * 5
+        response = json.dumps({"corrected_text": sample}, ensure_ascii=False)
+        parser = CorrectedTextStreamParser()
+        for chunk in random_chunks(response, random.Random(2)):
+            parser.feed(chunk)
+            self.assertTrue(sample.startswith(parser.text))
+        self.assertTrue(parser.done)
+        self.assertEqual(parser.text, sample)
+
+    def test_stops_after_value(self):
+        parser = feed_all(['{"corrected_text": "一つ目", "corrected_text": "二つ目"}'])
+        self.assertEqual(parser.text, "一つ目")
+        self.assertEqual(parser.feed('"corrected_text": "三つ目"'), "")
+
+    def test_missing_key(self):
+        parser = feed_all(['{"text": "値"}', ' 説明文'])
+        self.assertFalse(parser.done)
+        self.assertEqual(parser.text, "")
+
+
+if __name__ == "__main__":
+    unittest.main()